@@ -3,15 +3,90 @@ import sys
 sys.stdout.reconfigure(encoding="utf-8")
 import math
 import random
+import time
+import logging
+import multiprocessing
+import queue
+import numpy as np
 import fenix
+from fenix_utils import position_key, move_code, find_move
+from transposition import SharedTranspositionTable, EXACT, LOWER, UPPER
+from eval_cache import EvaluationCache, Weights
+from psq import PieceSquareTables
+from eval_profiler import EvaluationProfiler
+from search_stats import SearchStats
+from search_log import get_logger
+
+log = get_logger("agent")
+
+
+class _SearchAborted(Exception):
+    """Levée dans un worker Lazy SMP quand le processus principal arrête la recherche."""
 
 
 class Agent:
-    def __init__(self, player: int, depth: int = 3):
+    def __init__(self, player: int, depth: int = 3, workers: int = 1, tt_size: int = 1 << 18,
+                 ponder: bool = False, reuse_search: bool = True,
+                 incremental_eval: bool = False, debug_eval: bool = False,
+                 eval_cache_size: int = 1 << 16, psq_path: str = None,
+                 profile_eval: str = None):
         self.player = player
         self.depth = depth #profondeur de recherche
         self.prev_actions = [] #actions précédentes
 
+        # Lazy SMP : `workers` processus lancent la même recherche itérative sur une
+        # table de transposition partagée (workers=1 -> recherche classique)
+        self.workers = workers
+        self.tt_size = tt_size
+        self.tt = None
+        self._stop = None #drapeau partagé d'arrêt (workers uniquement)
+        self._order_noise = 0.0 #bruit sur l'ordre des coups (varie selon le worker)
+        self._smp = None
+
+        # Pondering : chercher la position attendue pendant le temps de l'adversaire
+        self.ponder = ponder
+        self._ponder = None
+        self._ponder_key = None #clé de la position prédite
+
+        # Réutilisation d'un tour à l'autre : table de transposition (vieillie à chaque
+        # recherche), coups killers (par n° de tour), table d'historique et variante principale
+        self.reuse_search = reuse_search
+        self.killers = {} #tour -> [coup, coup]
+        self.history = {} #code du coup -> score
+        self.pv_moves = {} #clé de position -> code du coup de la variante principale
+
+        # Évaluation incrémentale : matériel et positions des rois tenus à jour à chaque
+        # coup joué (state.eval_terms) au lieu d'être recalculés en parcourant le plateau.
+        # Les termes sont étiquetés par le n° de tour de l'état qui les porte : result()
+        # copie l'attribut tel quel dans l'enfant, dont le tour est différent, et ces
+        # termes copiés sont alors ignorés et recalculés.
+        # debug_eval vérifie à chaque appel que le score est identique au calcul complet
+        self.incremental_eval = incremental_eval
+        self.debug_eval = debug_eval
+
+        # Cache des évaluations (clé : position, joueur, version des poids), 0 -> désactivé.
+        # Peut être partagé entre agents en assignant le même EvaluationCache
+        self.eval_cache_size = eval_cache_size
+        self.eval_cache = EvaluationCache(eval_cache_size) if eval_cache_size else None
+
+        # Tables pièce-case apprises (fichier .npy / .npz, voir psq.py), ajoutées au score
+        self.psq_path = psq_path
+        self.psq = PieceSquareTables.load(psq_path) if psq_path else None
+
+        # Statistiques de la recherche en cours, et du dernier coup (dict, voir search_stats.py)
+        self.stats = SearchStats()
+        self.last_stats = None
+
+        # Profilage des caractéristiques d'évaluation (appels, temps, valeurs), écrit en
+        # JSON dans le fichier `profile_eval` en fin de partie. Désactivé : aucun surcoût,
+        # les méthodes instrumentées ne remplacent evaluate que si on le demande
+        self.profile_eval = profile_eval
+        self.eval_profiler = None
+        if profile_eval:
+            self.eval_profiler = EvaluationProfiler(self.FEATURES)
+            self.evaluate = self._evaluate_profiled
+            self.evaluate_many = self._evaluate_many_profiled
+
         # TODO - Bien pondérer en fonction du temps et de la partie
         self.mult = {
             "pieces": 1.756,
@@ -21,22 +96,46 @@ class Agent:
             "captures": 1.213} #pondération d'évaluation
 
 
+    @property
+    def mult(self):
+        return self._mult
+
+    @mult.setter
+    def mult(self, weights):
+        # Weights change de version à chaque modification -> pas de score périmé en cache
+        self._mult = Weights(weights)
+        self._bound = None
+
     def __str__(self):
         return "Finalpha"
 
     def act(self, state, remaining_time):
-        print(f"=== Tour n°{state.turn} ===")
+        action, _ = self.act_with_stats(state, remaining_time)
+        return action
+
+    def act_with_stats(self, state, remaining_time):
+        """Comme act, mais renvoie aussi les statistiques de la recherche : (coup, dict)"""
+        self.stats = SearchStats(state.turn)
+        cache = self.eval_cache
+        hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+        action = self._act(state, remaining_time)
+
+        self.stats.stop(cache, hits, misses)
+        self.last_stats = self.stats.to_dict()
+        log.debug("    Statistiques : %s", self.last_stats)
+        return action, self.last_stats
+
+    def _act(self, state, remaining_time):
+        log.info("=== Tour n°%s ===", state.turn)
 
         if state.turn <= 9: #disposition prédéfinie
-            print(f"    Création des généraux et du roi (coin)")
+            log.info("    Création des généraux et du roi (coin)")
             predifined_first_moves = self._opening(state.turn)
             if predifined_first_moves:
-                print(f"        Coup final = {predifined_first_moves}")
+                log.info("        Coup final = %s", predifined_first_moves)
                 return predifined_first_moves
 
-        best_value = -math.inf
-        best_action = None
-
         more_depth = 0 #bonus de profondeur
         total_pieces_on_board = state._has_piece(1) + state._has_piece(-1)
         more_depth = self.depth_calculator(total_pieces_on_board, state.dim, 300, remaining_time)
@@ -46,37 +145,233 @@ class Agent:
             self.depth = 2
             more_depth = 0
 
-        print(
-            f"    Analyse des possibilités avec une profondeur de {self.depth - 1 + more_depth}"
-        )
-        print(f'    Nombre de coups possibles: {len(state.actions())}')
-        for action in self._ordered_actions(state):
+        log.info("    Analyse des possibilités avec une profondeur de %s", self.depth - 1 + more_depth)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("    Nombre de coups possibles: %s", len(state.actions()))
+        search_depth = self.depth - 1 + more_depth
+        pondered = None
+        if self.ponder or self.reuse_search:
+            self._ensure_tt()
+        if self.ponder:
+            pondered = self._stop_pondering(state, search_depth)
+        self._new_search(state)
+        if self.eval_profiler is not None:
+            self._profile_root(state)
+
+        if pondered is not None:
+            best_action, best_value = pondered
+        elif self.workers > 1:
+            best_action, best_value = self._lazy_smp(state, search_depth)
+        elif self.reuse_search:
+            self.stats.depth, best_action, best_value = self._iterative_deepening(
+                state, search_depth, verbose=True
+            )
+        else:
+            best_action, best_value = self._search_root(state, search_depth, verbose=True)
+            self.stats.depth = search_depth
+        self._store_pv(state, search_depth + 1)
+
+        self.prev_actions.append(best_action)
+        if len(self.prev_actions) > 10:
+            self.prev_actions.pop(0)
+
+        log.info("    Meilleur coup final = %s avec une valeur de %s", best_action, best_value)
+        if self.ponder:
+            self._start_pondering(state, best_action, search_depth)
+        return best_action
+
+    def _search_root(self, state, depth, verbose=False):
+        best_value = -math.inf
+        best_action = None
+        actions = self._ordered_actions(state, self._tt_move(state))
+        self.stats.nodes += 1
+        self.stats.interior_nodes += 1
+        self.stats.children += len(actions)
+        for action in actions:
+            penalty = 3 if action in self.prev_actions else 0
+            # borne basse : un coup qui ne peut pas égaler le meilleur n'a pas besoin
+            # d'une valeur exacte (sans table de transposition : fenêtre complète)
+            alpha = best_value + penalty - 1e-9 if self.tt is not None else -math.inf
             value = self._opponent_turn_min(
-                state.result(action),
-                self.depth - 1 + more_depth,
-                -math.inf,
+                self._play(state, action),
+                depth,
+                alpha,
                 math.inf,
             )
-            if action in self.prev_actions:
-                value -= 3
+            value -= penalty
 
             if value > best_value or (
                 value == best_value and random.randint(1, 8) == 1
             ):
                 best_value = value
                 best_action = action
-                print(
-                    f"    Nouveau meilleur coup = {best_action} avec une valeur de {best_value}"
-                )
+                if verbose:
+                    log.debug("    Nouveau meilleur coup = %s avec une valeur de %s", best_action, best_value)
 
-        self.prev_actions.append(best_action)
-        if len(self.prev_actions) > 10:
-            self.prev_actions.pop(0)
+        if self.tt is not None:
+            self.tt.store(position_key(state), depth + 1, best_value, EXACT, move_code(best_action))
+        return best_action, best_value
 
-        print(
-            f"    Meilleur coup final = {best_action} avec une valeur de {best_value}"
-        )
-        return best_action
+    # --- RÉUTILISATION ENTRE LES TOURS ---------------------------------------
+
+    def _new_search(self, state):
+        """
+        Vieillit les informations de la recherche précédente au lieu de les effacer :
+        nouvelle génération de la table, killers des tours passés oubliés, historique divisé par 2
+        """
+        if self.tt is not None:
+            self.tt.new_search()
+        for turn in [t for t in self.killers if t < state.turn]:
+            del self.killers[turn]
+        for code in list(self.history):
+            self.history[code] //= 2
+            if self.history[code] == 0:
+                del self.history[code]
+
+    def _store_pv(self, state, length):
+        """Suit les meilleurs coups de la table depuis la racine pour garder la variante principale"""
+        self.pv_moves = {}
+        if self.tt is None:
+            return
+        for _ in range(length):
+            if state.is_terminal():
+                break
+            key = position_key(state)
+            action = find_move(state.actions(), self._tt_move(state))
+            if action is None:
+                break
+            self.pv_moves[key] = move_code(action)
+            state = state.result(action)
+
+    def _record_cutoff(self, state, action, depth, index):
+        # coup calme qui provoque une coupure -> killer du tour et bonus d'historique
+        self.stats.cutoffs += 1
+        if index == 0:
+            self.stats.first_move_cutoffs += 1
+        if action is None or action.removed:
+            return
+        code = move_code(action)
+        killers = self.killers.setdefault(state.turn, [])
+        if code not in killers:
+            killers.insert(0, code)
+            del killers[2:]
+        self.history[code] = self.history.get(code, 0) + depth * depth
+
+    # --- LAZY SMP -----------------------------------------------------------
+
+    def _iterative_deepening(self, state, max_depth, verbose=False):
+        """
+        Approfondissement itératif jusqu'à max_depth, renvoie le résultat de la
+        dernière itération terminée : (profondeur, coup, valeur)
+        """
+        done = (-1, None, -math.inf)
+        for depth in range(max_depth + 1):
+            try:
+                action, value = self._search_root(state, depth, verbose and depth == max_depth)
+            except _SearchAborted:
+                break
+            done = (depth, action, value)
+        return done
+
+    def _lazy_smp(self, state, max_depth):
+        """
+        Lance la recherche dans les workers puis la fait aussi dans le processus
+        principal. Tous partagent la même table de transposition : les workers
+        profitent des résultats des autres, et renvoient le plus profond qu'ils ont fini.
+        """
+        if self._smp is None:
+            self._ensure_tt()
+            self._smp = _SearchWorkers(self, range(1, self.workers))
+
+        # un worker sur deux cherche un coup plus loin
+        self._smp.submit(state, [max_depth + worker_id % 2 for worker_id in range(1, self.workers)],
+                         self.prev_actions, self.mult)
+        best = self._iterative_deepening(state, max_depth)
+
+        for depth, action, value in self._smp.collect():
+            if action is not None and depth > best[0]:
+                best = (depth, action, value)
+
+        log.info("    Profondeur atteinte (Lazy SMP) = %s", best[0])
+        self.stats.depth = best[0]
+        return best[1], best[2]
+
+    def _ensure_tt(self):
+        # mémoire partagée seulement si d'autres processus (Lazy SMP, pondering) lisent la table
+        if self.tt is None:
+            self.tt = SharedTranspositionTable(self.tt_size, shared=self.workers > 1 or self.ponder)
+
+    # --- PONDERING ----------------------------------------------------------
+
+    def _start_pondering(self, state, best_action, depth):
+        """
+        Prédit la réponse adverse (meilleur coup de la table de transposition, sinon
+        la réponse la moins bien évaluée pour nous) et lance la recherche de la
+        position attendue dans un processus de fond
+        """
+        child = state.result(best_action)
+        if child.is_terminal():
+            return
+        replies = child.actions()
+        reply = find_move(replies, self._tt_move(child))
+        if reply is None:
+            # nœud min : l'adversaire joue le coup qui minimise notre évaluation
+            scores = self.evaluate_many([self._play(child, action) for action in replies], self.player)
+            reply = replies[int(np.argmin(scores))]
+        predicted = child.result(reply)
+        if predicted.is_terminal():
+            return
+
+        if self._ponder is None:
+            self._ponder = _SearchWorkers(self, [0])
+        self._ponder_key = position_key(predicted)
+        self._ponder.submit(predicted, [depth + 2], self.prev_actions, self.mult)
+
+    def _stop_pondering(self, state, depth):
+        """
+        Arrête le pondering. Si la position prédite est arrivée et que le worker a
+        déjà fini une recherche assez profonde, renvoie son résultat (coup, valeur).
+        Sinon la table de transposition garde le travail déjà fait.
+        """
+        if self._ponder_key is None:
+            return None
+        hit = self._ponder_key == position_key(state)
+        self._ponder_key = None
+        results = self._ponder.collect()
+        if not hit:
+            return None
+        log.info("    Pondering : position prédite")
+        for ponder_depth, action, value in results:
+            if action is not None and ponder_depth >= depth:
+                log.info("    Pondering : profondeur %s déjà atteinte", ponder_depth)
+                self.stats.depth = ponder_depth
+                return action, value
+        return None
+
+    def worker_options(self):
+        """Options de l'agent à reproduire dans les processus de recherche"""
+        return {
+            "incremental_eval": self.incremental_eval,
+            "debug_eval": self.debug_eval,
+            "eval_cache_size": self.eval_cache_size,
+            "psq_path": self.psq_path,
+        }
+
+    def close(self):
+        """
+        Fin de partie (appelé par les gestionnaires de partie) : écrit le profil
+        d'évaluation, arrête les workers (Lazy SMP et pondering) et libère la table partagée
+        """
+        if self.eval_profiler is not None and self.eval_profiler.evaluations:
+            self.eval_profiler.dump(self.profile_eval, agent=str(self), player=self.player)
+        for workers in (self._smp, self._ponder):
+            if workers is not None:
+                workers.close()
+        self._smp = None
+        self._ponder = None
+        if self.tt is not None:
+            self.tt.close()
+            self.tt = None
 
     # --- DEPTH CALCULATOR ---------------------------------------------------
 
@@ -107,6 +402,29 @@ class Agent:
 
     
     def evaluate(self, next_state, player: int) -> float:
+        self.stats.evaluations += 1
+        if self.eval_cache is None:
+            return self._evaluate_uncached(next_state, player)
+        key = (position_key(next_state), player, self._mult.version,
+               self.psq.version if self.psq is not None else 0)
+        total = self.eval_cache.get(key)
+        if total is None:
+            total = self._evaluate_uncached(next_state, player)
+            self.eval_cache.put(key, total)
+        return total
+
+    def _evaluate_uncached(self, next_state, player: int) -> float:
+        if self.incremental_eval:
+            total = self._evaluate_incremental(next_state, player)
+        else:
+            total = self._evaluate_fused(next_state, player)
+        if self.debug_eval:
+            expected = self._evaluate_full(next_state, player)
+            assert total == expected, f"évaluation {total} != {expected} (calcul complet)\n{next_state}"
+        return total
+
+    def _evaluate_full(self, next_state, player: int) -> float:
+        # Évaluation de référence, caractéristique par caractéristique
         values = {
             "pieces": self._pieces_score(next_state, player),
             "mobility": self._mobility(next_state, player),
@@ -118,6 +436,8 @@ class Agent:
         total = 0
         for key in values:
             total += values[key] * self.mult[key]
+        if self.psq is not None:
+            total += self.psq.score(next_state, player)
 
         return round(total, 5)
     
@@ -207,66 +527,447 @@ class Agent:
                 max_removed_value = total_value
         return max_removed_value
 
+    # --- PROFILAGE ----------------------------------------------------------
+
+    FEATURES = ("pieces", "mobility", "king_safety", "king_threat", "captures")
+
+    def _feature_values(self, state, player, profiler=None):
+        """Caractéristiques de _evaluate_full, chronométrées si un profiler est donné"""
+        functions = (
+            ("pieces", self._pieces_score),
+            ("mobility", self._mobility),
+            ("king_safety", self._king_safety),
+            ("king_threat", self._king_threat_score),
+            ("captures", lambda s, _: self._multiple_capture(s)),
+        )
+        values = {}
+        for name, function in functions:
+            start = time.perf_counter()
+            values[name] = function(state, player)
+            if profiler is not None:
+                profiler.record(name, values[name], time.perf_counter() - start)
+        return values
+
+    def _evaluate_profiled(self, next_state, player: int) -> float:
+        # même calcul que _evaluate_full (sans cache, pour mesurer le vrai coût)
+        values = self._feature_values(next_state, player, self.eval_profiler)
+        self.eval_profiler.evaluations += 1
+
+        total = 0
+        for key in values:
+            total += values[key] * self.mult[key]
+        if self.psq is not None:
+            total += self.psq.score(next_state, player)
+
+        return round(total, 5)
+
+    def _evaluate_many_profiled(self, states, player: int):
+        return np.array([self._evaluate_profiled(state, player) for state in states], dtype=np.float64)
+
+    def _profile_root(self, state):
+        # quelles caractéristiques changent le meilleur coup (au sens de l'évaluation statique)
+        rows = [self._feature_values(self._play(state, action), self.player) for action in state.actions()]
+        self.eval_profiler.record_root_choice(rows, self.mult)
+
+    # --- ÉVALUATION PAR LOTS ------------------------------------------------
+
+    # valeur signée des pièces (indice : pièce + 3), comme _pieces_score
+    MATERIAL_LUT = np.array([-100, -10, -1, 0, 1, 10, 100])
+    # bonus de menace (indice : pièce * joueur + 3), comme _king_threat_score
+    THREAT_LUT = np.array([0, 0, 0, 0, 2, 3, 5])
+    NEIGHBOR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+    def evaluate_many(self, states, player: int):
+        """
+        Évalue une liste d'états d'un coup (typiquement les enfants d'un nœud).
+        Renvoie un tableau NumPy identique à [self.evaluate(s, player) for s in states]
+        """
+        self.stats.evaluations += len(states)
+        scores = [None] * len(states)
+        keys = None
+        missing = range(len(states))
+        if self.eval_cache is not None:
+            psq_version = self.psq.version if self.psq is not None else 0
+            keys = [(position_key(state), player, self._mult.version, psq_version) for state in states]
+            scores = [self.eval_cache.get(key) for key in keys]
+            missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            batch = [states[i] for i in missing]
+            totals = self._evaluate_batch(batch, player)
+            for i, state, total in zip(missing, batch, totals):
+                if self.debug_eval:
+                    expected = self._evaluate_full(state, player)
+                    assert total == expected, f"évaluation par lot {total} != {expected}\n{state}"
+                scores[i] = total
+                if keys is not None:
+                    self.eval_cache.put(keys[i], total)
+        return np.array(scores, dtype=np.float64)
+
+    def _encode_boards(self, states):
+        """Plateaux sous forme d'un tableau (n, lignes, colonnes) de valeurs de pièces"""
+        rows, cols = states[0].dim
+        board = np.zeros((len(states), rows * cols), dtype=np.int64)
+        for i, state in enumerate(states):
+            if state.pieces:
+                board[i, [row * cols + col for row, col in state.pieces]] = list(state.pieces.values())
+        return board.reshape(len(states), rows, cols)
+
+    def _evaluate_batch(self, states, player):
+        """
+        Matériel, sécurité du roi, menace sur le roi adverse et tables pièce-case sont
+        vectorisés sur tout le lot ; la mobilité et les captures demandent encore une génération de coups par état.
+        Les opérations flottantes se font dans le même ordre que _evaluate_full.
+        """
+        board = self._encode_boards(states)
+        rows, cols = board.shape[1:]
+        mine = board * player
+
+        material = player * self.MATERIAL_LUT[board + 3].sum(axis=(1, 2))
+
+        own = np.pad(mine > 0, ((0, 0), (1, 1), (1, 1))).astype(np.int64)
+        neighbors = sum(own[:, 1 + dx:1 + dx + rows, 1 + dy:1 + dy + cols] for dx, dy in self.NEIGHBOR_OFFSETS)
+        corners = np.zeros((rows, cols), dtype=np.int64)
+        corners[[0, 0, rows - 1, rows - 1], [0, cols - 1, 0, cols - 1]] = 2
+        my_king = mine == 3
+        king_safety = np.where(
+            my_king.any(axis=(1, 2)), (my_king * (neighbors + corners)).sum(axis=(1, 2)), -50
+        )
+
+        bonus = np.pad(self.THREAT_LUT[mine + 3], ((0, 0), (2, 2), (2, 2)))
+        threat_map = sum(bonus[:, 2 + dx:2 + dx + rows, 2 + dy:2 + dy + cols] for dx, dy in self.THREAT_OFFSETS)
+        king_threat = ((mine == -3) * threat_map).sum(axis=(1, 2))
+
+        move_features = np.array([self._move_features(state, player) for state in states], dtype=np.int64)
+
+        _, w_pieces, w_mobility, w_safety, w_threat, w_captures = self._bound_weights()
+        total = np.zeros(len(states))
+        total += material * w_pieces
+        total += move_features[:, 0] * w_mobility
+        total += king_safety * w_safety
+        total += king_threat * w_threat
+        total += move_features[:, 1] * w_captures
+
+        if self.psq is not None:
+            total += self.psq.score_many(states, player, self.psq.encode_boards(board))
+        return [round(t, 5) for t in total.tolist()]
+
+    def _bound_weights(self):
+        """Poids sous forme de tuple, recalculé seulement quand self.mult change"""
+        mult = self._mult
+        if self._bound is None or self._bound[0] != mult.version:
+            self._bound = (
+                mult.version, mult["pieces"], mult["mobility"], mult["king_safety"],
+                mult["king_threat"], mult["captures"],
+            )
+        return self._bound
+
+    def _move_features(self, state, player):
+        """
+        (mobilité de `player`, valeur de la plus grosse capture du joueur au trait) :
+        une seule génération de coups quand `player` est au trait, deux sinon
+        """
+        actions = state.actions() if state.current_player == player else None
+        if actions is None:
+            mobility = self._mobility(state, player)
+            captures = self._multiple_capture(state)
+        else:
+            mobility = len(actions)
+            pieces = state.pieces
+            captures = 0
+            for action in actions:
+                if action.removed:
+                    total_value = sum(abs(pieces.get(pos, 0)) for pos in action.removed)
+                    if total_value > captures:
+                        captures = total_value
+        return mobility, captures
+
+    def _evaluate_fused(self, next_state, player: int) -> float:
+        """
+        Même score que _evaluate_full (au bit près), mais toutes les caractéristiques
+        sont calculées en un seul parcours du plateau, avec les poids pré-liés
+        """
+        _, w_pieces, w_mobility, w_safety, w_threat, w_captures = self._bound_weights()
+        values = self.PIECE_VALUES
+        material = 0
+        my_king = None
+        opponent_king = None
+        for pos, piece in next_state.pieces.items():
+            if piece * player > 0:
+                material += values[abs(piece)]
+                if piece == 3 * player and my_king is None:
+                    my_king = pos
+            else:
+                material -= values[abs(piece)]
+                if piece == -3 * player and opponent_king is None:
+                    opponent_king = pos
+        mobility, captures = self._move_features(next_state, player)
+
+        total = 0
+        total += material * w_pieces
+        total += mobility * w_mobility
+        total += self._king_safety_at(next_state, player, my_king) * w_safety
+        total += self._king_threat_at(next_state, player, opponent_king) * w_threat
+        total += captures * w_captures
+        if self.psq is not None:
+            total += self.psq.score(next_state, player)
+        return round(total, 5)
+
+    # --- ÉVALUATION INCRÉMENTALE -------------------------------------------
+
+    PIECE_VALUES = {1: 1, 2: 10, 3: 100} #soldat, général, roi (comme _pieces_score)
+
+    def _play(self, state, action):
+        """state.result(action), en propageant les termes incrémentaux si besoin"""
+        child = state.result(action)
+        if self.incremental_eval:
+            child.eval_terms = (child.turn, self._delta_terms(state, action))
+        return child
+
+    def _scan_terms(self, state):
+        """
+        Calcul complet des termes incrémentaux : (matériel du point de vue du
+        joueur 1, position du roi du joueur 1, position du roi du joueur -1)
+        """
+        material = 0
+        kings = {1: None, -1: None}
+        for pos, piece in state.pieces.items():
+            owner = 1 if piece > 0 else -1
+            material += owner * self.PIECE_VALUES[abs(piece)]
+            if abs(piece) == 3:
+                kings[owner] = pos
+        return material, kings[1], kings[-1]
+
+    def _terms(self, state):
+        # (tour, termes) : des termes venus d'un autre tour ont été copiés par result()
+        # depuis le parent et ne décrivent pas ce plateau
+        tagged = getattr(state, "eval_terms", None)
+        if tagged is not None and tagged[0] == state.turn:
+            return tagged[1]
+        terms = self._scan_terms(state)
+        state.eval_terms = (state.turn, terms)
+        return terms
+
+    def _delta_terms(self, state, action):
+        """
+        Termes de l'état après `action`, à partir de ceux de `state` : seules les cases
+        de départ, d'arrivée (empilement -> général / roi) et les pièces capturées changent
+        """
+        material, king_red, king_black = self._terms(state)
+        values = self.PIECE_VALUES
+        mover = state.pieces[action.start]
+        owner = 1 if mover > 0 else -1
+        landed_on = state.pieces.get(action.end, 0)
+        new_piece = landed_on + mover
+
+        material += owner * (values[abs(new_piece)] - values[abs(mover)])
+        if landed_on:
+            material -= owner * values[abs(landed_on)]
+        kings = {1: king_red, -1: king_black}
+        if abs(new_piece) == 3:
+            kings[owner] = action.end
+        for pos in action.removed:
+            captured = state.pieces[pos]
+            material += owner * values[abs(captured)]
+            if abs(captured) == 3:
+                kings[-owner] = None
+        return material, kings[1], kings[-1]
+
+    # Cases à distance de Manhattan <= 2 (hors centre), pour _king_threat_score
+    THREAT_OFFSETS = [
+        (dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+        if 0 < abs(dx) + abs(dy) <= 2
+    ]
+
+    def _king_safety_at(self, state, player, king):
+        # _king_safety sans parcours du plateau : seules les 8 cases autour du roi comptent
+        if king is None:
+            return -50
+        row, col = king
+        pieces = state.pieces
+        score = 0
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if dx == 0 and dy == 0:
+                    continue
+                if pieces.get((row + dx, col + dy), 0) * player > 0:
+                    score += 1
+        if (row in [0, state.dim[0]-1]) and (col in [0, state.dim[1]-1]):
+            score += 2
+        return score
+
+    def _king_threat_at(self, state, player, opponent_king):
+        # _king_threat_score sans parcours du plateau : 12 cases autour du roi adverse
+        if opponent_king is None:
+            return 0
+        kx, ky = opponent_king
+        pieces = state.pieces
+        bonus = {1: 2, 2: 3, 3: 5}
+        score = 0
+        for dx, dy in self.THREAT_OFFSETS:
+            piece = pieces.get((kx + dx, ky + dy), 0)
+            if piece * player > 0:
+                score += bonus[abs(piece)]
+        return score
+
+    def _evaluate_incremental(self, next_state, player: int) -> float:
+        material, king_red, king_black = self._terms(next_state)
+        kings = {1: king_red, -1: king_black}
+        _, w_pieces, w_mobility, w_safety, w_threat, w_captures = self._bound_weights()
+        mobility, captures = self._move_features(next_state, player)
+
+        # même ordre d'addition que _evaluate_full -> score identique au bit près
+        total = 0
+        total += player * material * w_pieces
+        total += mobility * w_mobility
+        total += self._king_safety_at(next_state, player, kings[player]) * w_safety
+        total += self._king_threat_at(next_state, player, kings[-player]) * w_threat
+        total += captures * w_captures
+        if self.psq is not None:
+            total += self.psq.score(next_state, player)
+        return round(total, 5)
+
     # --- ALPHA-BETA --------------------------------------------------------
 
     def _player_turn_max(self, next_state, depth, alpha, beta):
         # Calcule le score d'un state (ou appelle le tour suivant) - max donc plus score est haut, mieux c'est
 
+        if self._stop is not None and self._stop.value:
+            raise _SearchAborted()
+
+        self.stats.nodes += 1
         if next_state.is_terminal():
             return next_state.utility(self.player) * 1000
 
         if depth == 0:
             return self.evaluate(next_state, self.player)
 
+        key, tt_move, cut = self._tt_probe(next_state, depth, alpha, beta)
+        if cut is not None:
+            return cut
+
+        alpha_orig = alpha
+        best_action = None
         score = -math.inf
-        for action in self._ordered_actions(next_state):
-            score = max(
-                score,
-                self._opponent_turn_min(next_state.result(action), depth - 1, alpha, beta
-                ),
-            )
+        actions = self._ordered_actions(next_state, tt_move)
+        self.stats.interior_nodes += 1
+        self.stats.children += len(actions)
+        for i, action in enumerate(actions):
+            value = self._opponent_turn_min(self._play(next_state, action), depth - 1, alpha, beta)
+            if value > score:
+                score = value
+                best_action = action
             if score >= beta:
-                return score
+                self._record_cutoff(next_state, best_action, depth, i)
+                break
             alpha = max(alpha, score)
+
+        self._tt_store(key, depth, score, alpha_orig, beta, best_action)
         return score
 
     def _opponent_turn_min(self, next_state, depth, alpha, beta):
         # Calcule le score d'un state (ou appelle le tour suivant) - min donc plus score est bas, mieux c'est
 
+        if self._stop is not None and self._stop.value:
+            raise _SearchAborted()
+
+        self.stats.nodes += 1
         if next_state.is_terminal():
             return next_state.utility(self.player) * 1000
 
         if depth == 0:
             return self.evaluate(next_state, self.player)
 
+        key, tt_move, cut = self._tt_probe(next_state, depth, alpha, beta)
+        if cut is not None:
+            return cut
+
+        beta_orig = beta
+        best_action = None
         score = math.inf
-        for action in self._ordered_actions(next_state):
-            score = min(
-                score,
-                self._player_turn_max(
-                    next_state.result(action), depth - 1, alpha, beta
-                ),
-            )
+        actions = self._ordered_actions(next_state, tt_move)
+        self.stats.interior_nodes += 1
+        self.stats.children += len(actions)
+        for i, action in enumerate(actions):
+            value = self._player_turn_max(self._play(next_state, action), depth - 1, alpha, beta)
+            if value < score:
+                score = value
+                best_action = action
             if score <= alpha:
-                return score
+                self._record_cutoff(next_state, best_action, depth, i)
+                break
             beta = min(beta, score)
+
+        self._tt_store(key, depth, score, alpha, beta_orig, best_action)
         return score
 
+    # --- TABLE DE TRANSPOSITION ---------------------------------------------
+
+    def _tt_probe(self, state, depth, alpha, beta):
+        """
+        Renvoie (clé, code du meilleur coup connu, score si coupure possible sinon None)
+        """
+        if self.tt is None:
+            return None, 0, None
+        key = position_key(state)
+        entry = self.tt.probe(key)
+        self.stats.tt_probes += 1
+        if entry is None:
+            return key, 0, None
+        self.stats.tt_hits += 1
+        value, entry_depth, flag, move = entry
+        if entry_depth >= depth:
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                return key, move, value
+        return key, move, None
+
+    def _tt_store(self, key, depth, score, alpha, beta, best_action):
+        if key is None:
+            return
+        if score <= alpha:
+            flag = UPPER
+        elif score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, score, flag, move_code(best_action))
+
+    def _tt_move(self, state):
+        if self.tt is None:
+            return 0
+        entry = self.tt.probe(position_key(state))
+        return 0 if entry is None else entry[3]
+
     # --- UTILITAIRES --------------------------------------------------------
 
-    def _ordered_actions(self, state):
-        # Trier les states à explorer en fonction de leur évaluation
+    def _ordered_actions(self, state, tt_move=0):
+        # Trier les states à explorer en fonction de leur évaluation (l'historique
+        # départage les égalités). Passent devant : le meilleur coup de la table de
+        # transposition (ou de la variante principale), puis les killers du tour
         actions = state.actions()
         scores = []
         final_actions = []
 
-        for action in actions:
-            score = self.evaluate(state.result(action), self.player)
-            scores.append((score, action))
+        children = [self._play(state, action) for action in actions]
+        child_scores = self.evaluate_many(children, self.player).tolist() if children else []
+        for action, score in zip(actions, child_scores):
+            if self._order_noise:
+                score += random.uniform(-self._order_noise, self._order_noise)
+            history = self.history.get(move_code(action), 0) if self.history else 0
+            scores.append((score, history, action))
         scores.sort(reverse=True)
 
         for action in scores:
-            final_actions.append(action[1])
+            final_actions.append(action[2])
+
+        if not tt_move and self.pv_moves:
+            tt_move = self.pv_moves.get(position_key(state), 0)
+        first_moves = [tt_move] + self.killers.get(state.turn, [])
+        for code in reversed(first_moves):
+            first = find_move(final_actions, code)
+            if first is not None:
+                final_actions.remove(first)
+                final_actions.insert(0, first)
 
         return final_actions
 
@@ -284,4 +985,77 @@ class Agent:
             fenix.FenixAction((0, 2), (1, 2), removed=frozenset()),
             fenix.FenixAction((6, 5), (5, 5), removed=frozenset()),
         ]
-        return openings[turn]
\ No newline at end of file
+        return openings[turn]
+
+
+class _SearchWorkers:
+    """
+    Processus de recherche persistants qui partagent la table de transposition
+    de l'agent. Chaque tâche est une recherche itérative, arrêtée par un drapeau partagé.
+    """
+
+    def __init__(self, agent, worker_ids):
+        self.tasks = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.stop = multiprocessing.RawValue("b", 0)
+        self.seq = 0
+        self.pending = 0
+        self.procs = []
+        for worker_id in worker_ids:
+            proc = multiprocessing.Process(
+                target=_search_worker,
+                args=(worker_id, agent.player, agent.depth, agent.worker_options(), agent.tt.name,
+                      agent.tt_size, self.tasks, self.results, self.stop),
+                daemon=True,
+            )
+            proc.start()
+            self.procs.append(proc)
+
+    def submit(self, state, depths, prev_actions, mult):
+        """Envoie la même position à chaque worker, avec sa profondeur maximale"""
+        self.seq += 1
+        self.stop.value = 0
+        for max_depth in depths:
+            self.tasks.put((self.seq, state, max_depth, list(prev_actions), dict(mult)))
+        self.pending = len(depths)
+
+    def collect(self):
+        """Arrête la recherche en cours et renvoie les (profondeur, coup, valeur) reçus"""
+        self.stop.value = 1
+        results = []
+        while self.pending > 0:
+            try:
+                seq, depth, action, value = self.results.get(timeout=5)
+            except queue.Empty:
+                break
+            if seq == self.seq:
+                self.pending -= 1
+                results.append((depth, action, value))
+        self.pending = 0
+        return results
+
+    def close(self):
+        self.stop.value = 1
+        for _ in self.procs:
+            self.tasks.put(None)
+        for proc in self.procs:
+            proc.join(timeout=1)
+
+
+def _search_worker(worker_id, player, depth, options, tt_name, tt_size, tasks, results, stop):
+    """Boucle d'un worker : une recherche itérative par tâche reçue"""
+    random.seed(worker_id)
+    agent = Agent(player, depth, **options)
+    agent.tt = SharedTranspositionTable(tt_size, name=tt_name)
+    agent._stop = stop
+    agent._order_noise = 0.05 * worker_id
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, state, max_depth, prev_actions, mult = task
+        agent.prev_actions = prev_actions
+        agent.mult = mult
+        depth_done, action, value = agent._iterative_deepening(state, max_depth)
+        results.put((seq, depth_done, action, value))
+    agent.tt.close()
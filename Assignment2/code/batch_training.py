@@ -1,15 +1,22 @@
 import multiprocessing
+import logging
 from agent import Agent
 import past_agents
-from visual_game_manager import VisualGameManager
+from headless_game_manager import HeadlessGameManager
 import history_manager
+from search_log import configure_logging, flush_logging
 
 def run_game(game_id):
     red_agent = Agent(player=1, depth=3)
     black_agent = past_agents.all_agents[4](player=-1, depth=3)
 
-    game = VisualGameManager(red_agent, black_agent, total_time=300, min_agent_play_time=0.2)
-    results = game.play()
+    # sans affichage ni temps minimal par coup : seules les réflexions des agents comptent
+    game = HeadlessGameManager(red_agent, black_agent, total_time=300)
+    try:
+        results = game.play()
+    finally:
+        # le Pool tue ses workers à la fin : les logs tamponnés sont écrits après chaque partie
+        flush_logging()
 
     history_manager.update_history(
         red_agent=str(red_agent),
@@ -24,6 +31,8 @@ def run_game(game_id):
 if __name__ == "__main__":
     NUM_GAMES = 30  # ← change ici pour faire plus de parties
 
-    # Lance les parties en parallèle
-    with multiprocessing.Pool(processes=4) as pool:  # ← tu peux ajuster à ton nombre de cœurs
+    # Lance les parties en parallèle, sans logs (configure_logging(logging.DEBUG, path="logs_{pid}.txt",
+    # console=False) pour un fichier tamponné par processus)
+    with multiprocessing.Pool(processes=4, initializer=configure_logging,
+                              initargs=(logging.WARNING, None, False)) as pool:  # ← tu peux ajuster à ton nombre de cœurs
         pool.map(run_game, range(NUM_GAMES))
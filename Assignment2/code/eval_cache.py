@@ -0,0 +1,118 @@
+"""
+Bounded cache of static evaluations, and a weight dict that knows when it changed.
+"""
+from collections import OrderedDict
+
+
+class Weights(dict):
+    """
+    Evaluation weights (feature name -> multiplier).
+
+    `version` is a fingerprint of the content, recomputed on every change, so that a
+    cache keyed on it never returns a score computed with other weights, while two
+    agents with the same weights can share cached scores.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._refresh()
+
+    def _refresh(self):
+        self.version = hash(tuple(sorted(self.items())))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._refresh()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._refresh()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._refresh()
+
+    def __ior__(self, other):
+        # dict.__ior__ ne passe pas par update
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._refresh()
+        return value
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._refresh()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._refresh()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._refresh()
+
+    def __reduce__(self):
+        return (Weights, (dict(self),))
+
+
+class EvaluationCache:
+    """
+    Fixed-size evaluation cache with least-recently-used eviction.
+
+    Attributes:
+        capacity (int): Maximum number of stored scores.
+        hits (int): Number of lookups that found a score.
+        misses (int): Number of lookups that did not.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the cached score for a key, or None.
+
+        Args:
+            key (tuple): (position key, player, weights version).
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate(), 4),
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._entries.clear()
+        self.reset_stats()
@@ -0,0 +1,99 @@
+"""
+Opt-in instrumentation of the evaluation features of agent.Agent.
+"""
+import json
+from collections import Counter
+
+
+class EvaluationProfiler:
+    """
+    Collects, per evaluation feature: call count, cumulative wall time and value
+    distribution, plus how often each feature decides which root move ranks first.
+
+    Attributes:
+        features (tuple of str): Names of the profiled features.
+        decisions (int): Number of root decisions recorded.
+    """
+
+    def __init__(self, features):
+        self.features = tuple(features)
+        self.reset()
+
+    def reset(self):
+        self.evaluations = 0
+        self.calls = {f: 0 for f in self.features}
+        self.time = {f: 0.0 for f in self.features}
+        self.values = {f: Counter() for f in self.features}
+        self.decisions = 0
+        self.decisive = {f: 0 for f in self.features}
+
+    def record(self, feature, value, elapsed):
+        """
+        Records one computation of a feature.
+
+        Args:
+            feature (str): Feature name.
+            value (int or float): Unweighted feature value.
+            elapsed (float): Time spent computing it, in seconds.
+        """
+        self.calls[feature] += 1
+        self.time[feature] += elapsed
+        self.values[feature][value] += 1
+
+    def record_root_choice(self, rows, weights):
+        """
+        Records a root decision: for each feature, whether removing it from the weighted
+        sum changes which root child has the best static score.
+
+        Args:
+            rows (list of dict): Unweighted feature values of each root child.
+            weights (dict): Feature name -> weight.
+        """
+        if len(rows) < 2:
+            return
+        totals = [sum(row[f] * weights[f] for f in self.features) for row in rows]
+        best = max(range(len(rows)), key=totals.__getitem__)
+        self.decisions += 1
+        for feature in self.features:
+            without = [total - row[feature] * weights[feature] for total, row in zip(totals, rows)]
+            if max(range(len(rows)), key=without.__getitem__) != best:
+                self.decisive[feature] += 1
+
+    def _distribution(self, counter):
+        count = sum(counter.values())
+        if count == 0:
+            return {"count": 0}
+        mean = sum(v * n for v, n in counter.items()) / count
+        variance = sum(n * (v - mean) ** 2 for v, n in counter.items()) / count
+        return {
+            "count": count,
+            "min": min(counter),
+            "max": max(counter),
+            "mean": round(mean, 4),
+            "std": round(variance ** 0.5, 4),
+            "histogram": {str(v): n for v, n in sorted(counter.items())},
+        }
+
+    def to_dict(self):
+        return {
+            "evaluations": self.evaluations,
+            "decisions": self.decisions,
+            "features": {
+                f: {
+                    "calls": self.calls[f],
+                    "time_s": round(self.time[f], 6),
+                    "time_per_call_us": round(1e6 * self.time[f] / self.calls[f], 3) if self.calls[f] else 0.0,
+                    "decisive_rate": round(self.decisive[f] / self.decisions, 4) if self.decisions else 0.0,
+                    "values": self._distribution(self.values[f]),
+                }
+                for f in self.features
+            },
+        }
+
+    def dump(self, path, **extra):
+        """Appends the collected data as one JSON line to `path`, then resets."""
+        record = dict(extra)
+        record.update(self.to_dict())
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.reset()
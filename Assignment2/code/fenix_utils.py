@@ -0,0 +1,302 @@
+"""
+Low-level helpers on FenixState shared by the agents.
+"""
+import random
+
+import fenix
+
+# Zobrist keys: one random 64-bit number per (square, piece) and per state flag.
+# The seed is fixed so that every process (forked or spawned) computes the same keys
+# for the same position, which the shared transposition table relies on.
+_zobrist_rng = random.Random(1361)
+ZOBRIST_PIECES = {
+    (row, col): {piece: _zobrist_rng.getrandbits(64) for piece in (-3, -2, -1, 1, 2, 3)}
+    for row in range(7) for col in range(8)
+}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+ZOBRIST_CAN_CREATE_GENERAL = _zobrist_rng.getrandbits(64)
+ZOBRIST_CAN_CREATE_KING = _zobrist_rng.getrandbits(64)
+ZOBRIST_SETUP = _zobrist_rng.getrandbits(64)
+
+
+def position_key(state):
+    """
+    Returns a 64-bit Zobrist key identifying everything the search depends on in a
+    state: the board, the side to move, the general/king creation flags and whether
+    the setup phase is still running.
+
+    Built from the pieces themselves rather than FenixState._hash(), which hashes the
+    board values and therefore cannot tell a -1 from a -2 (hash(-1) == hash(-2)).
+
+    Args:
+        state (FenixState): The state to identify.
+
+    Returns:
+        int: An unsigned 64-bit key.
+    """
+    key = 0
+    for position, piece in state.pieces.items():
+        key ^= ZOBRIST_PIECES[position][piece]
+    if state.current_player == -1:
+        key ^= ZOBRIST_BLACK_TO_MOVE
+    if state.can_create_general:
+        key ^= ZOBRIST_CAN_CREATE_GENERAL
+    if state.can_create_king:
+        key ^= ZOBRIST_CAN_CREATE_KING
+    if state.turn < 10:
+        key ^= ZOBRIST_SETUP
+    return key
+
+
+def square_index(position, dim=(7, 8)):
+    return position[0] * dim[1] + position[1]
+
+
+def move_code(action, dim=(7, 8)):
+    """
+    Compact code (start, end) of an action, 0 meaning "no move".
+    Used as a move-ordering hint: the removed set is not encoded.
+    """
+    if action is None:
+        return 0
+    return 1 + square_index(action.start, dim) * dim[0] * dim[1] + square_index(action.end, dim)
+
+
+def find_move(actions, code, dim=(7, 8)):
+    """Returns the first action of the list matching a move code, or None."""
+    if code == 0:
+        return None
+    for action in actions:
+        if move_code(action, dim) == code:
+            return action
+    return None
+
+
+def encode_state(state):
+    """
+    Compact, picklable encoding of a state (for inter-process messages): the board as
+    bytes plus the counters that FenixState.is_terminal and utility depend on.
+
+    Args:
+        state (FenixState): The state to encode.
+
+    Returns:
+        tuple: (board bytes, turn, current_player, can_create_general, can_create_king,
+            boring_turn, history_boring_turn_hash).
+    """
+    return (
+        bytes(value + 3 for value in state._flatten()),
+        state.turn,
+        state.current_player,
+        state.can_create_general,
+        state.can_create_king,
+        state.boring_turn,
+        tuple(state.history_boring_turn_hash),
+    )
+
+
+def decode_state(encoded, dim=(7, 8)):
+    """Rebuilds the FenixState encoded by encode_state."""
+    board, turn, current_player, can_create_general, can_create_king, boring_turn, history = encoded
+    state = fenix.FenixState.__new__(fenix.FenixState)
+    state.dim = dim
+    state.pieces = {
+        divmod(square, dim[1]): value - 3 for square, value in enumerate(board) if value != 3
+    }
+    state.turn = turn
+    state.current_player = current_player
+    state.can_create_general = can_create_general
+    state.can_create_king = can_create_king
+    state.precomputed_hash = None
+    state.history_boring_turn_hash = list(history)
+    state.boring_turn = boring_turn
+    return state
+
+
+def encode_action(action, dim=(7, 8)):
+    """
+    Compact code of a full action, as two integers: its move_code and the bit mask of
+    its removed squares (56 squares fit in 64 bits).
+    """
+    removed = 0
+    for pos in action.removed:
+        removed |= 1 << square_index(pos, dim)
+    return move_code(action, dim), removed
+
+
+def decode_action(code, dim=(7, 8)):
+    """Rebuilds the FenixAction encoded by encode_action."""
+    move, removed = code
+    start, end = divmod(move - 1, dim[0] * dim[1])
+    squares = []
+    square = 0
+    while removed:
+        if removed & 1:
+            squares.append(divmod(square, dim[1]))
+        removed >>= 1
+        square += 1
+    return fenix.FenixAction(divmod(start, dim[1]), divmod(end, dim[1]), frozenset(squares))
+
+
+def copy_state(state):
+    """Copy of a state that shares nothing mutable with it, cheaper than deepcopy."""
+    copy = fenix.FenixState.__new__(fenix.FenixState)
+    copy.dim = state.dim
+    copy.pieces = dict(state.pieces)
+    copy.turn = state.turn
+    copy.current_player = state.current_player
+    copy.can_create_general = state.can_create_general
+    copy.can_create_king = state.can_create_king
+    copy.precomputed_hash = state.precomputed_hash
+    copy.history_boring_turn_hash = list(state.history_boring_turn_hash)
+    copy.boring_turn = state.boring_turn
+    return copy
+
+
+def apply_action(state, action):
+    """
+    Plays an action on `state` in place, with the same effect as FenixState.result
+    (for rollouts on a scratch state, see copy_state).
+
+    Args:
+        state (FenixState): The state to modify.
+        action (FenixAction): A legal action of the state.
+    """
+    previous_hash = state._hash()
+    pieces = state.pieces
+    pieces[action.end] = pieces.get(action.end, 0) + pieces.pop(action.start)
+
+    state.can_create_general = False
+    state.can_create_king = False
+    for removed_piece in action.removed:
+        removed_piece_type = abs(pieces.pop(removed_piece))
+        if removed_piece_type == 2:
+            state.can_create_general = True
+        elif removed_piece_type == 3:
+            state.can_create_king = True
+
+    state.turn += 1
+    state.current_player = -state.current_player
+    state.precomputed_hash = None
+
+    if len(action.removed) > 0:
+        state.boring_turn = 0
+        state.history_boring_turn_hash = []
+    elif state.turn > 10:
+        state.boring_turn += 1
+        state.history_boring_turn_hash.append(previous_hash)
+
+
+ORTHOGONAL_DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1))
+KING_DIRECTIONS = ORTHOGONAL_DIRECTIONS + ((-1, -1), (-1, 1), (1, 1), (1, -1))
+
+
+def quick_check_action(state, action):
+    """
+    Legality check of an action returned by a trusted agent, without generating all the
+    moves of the state. It enforces the rules of the move itself: a piece of the player
+    to move leaves `start` and lands on the board; during the setup (turn < 10) a soldier
+    stacks on an adjacent soldier (at most 4 generals) or general (no king yet); after it,
+    a soldier may stack on a soldier only if can_create_general and on a general only if
+    can_create_king; a plain move is one step for soldiers (orthogonal) and the king (any
+    direction) or a free straight line for generals; and a capture is a chain of jumps
+    over exactly the removed squares (see _capture_chain_exists). Unlike
+    `action in state.actions()`, it does not check that the action captures the maximum
+    number of units.
+
+    Args:
+        state (FenixState): The state before the action.
+        action (FenixAction): The action to check.
+
+    Returns:
+        bool: Whether the action passes the check.
+    """
+    try:
+        start, end, removed = action
+        end_row, end_col = end
+        removed = frozenset(removed)
+    except (TypeError, ValueError):
+        return False
+    player = state.current_player
+    pieces = state.pieces
+    piece = pieces.get(start, 0) * player
+    if piece <= 0 or start == end:
+        return False
+    if not (0 <= end_row < state.dim[0] and 0 <= end_col < state.dim[1]):
+        return False
+    target = pieces.get(end, 0) * player
+    if target < 0 or any(pieces.get(pos, 0) * player >= 0 for pos in removed):
+        return False
+
+    step = (end[0] - start[0], end[1] - start[1])
+    if state.turn < 10:
+        if removed or piece != 1 or step not in ORTHOGONAL_DIRECTIONS:
+            return False
+        if target == 1:
+            return state._count_generals(player) < 4
+        return target == 2 and not state._has_king(player)
+
+    if target > 0:
+        # empilement : un soldat sur une case voisine, si la création est permise
+        if removed or piece != 1 or step not in ORTHOGONAL_DIRECTIONS:
+            return False
+        return (target == 1 and state.can_create_general) or (target == 2 and state.can_create_king)
+
+    if removed:
+        return _capture_chain_exists(state, start, end, removed, piece)
+    if piece == 1:
+        return step in ORTHOGONAL_DIRECTIONS
+    if piece == 3:
+        return step in KING_DIRECTIONS
+    # général : ligne droite dont toutes les cases sont libres
+    if step[0] and step[1]:
+        return False
+    distance = abs(step[0] + step[1])
+    direction = (step[0] // distance, step[1] // distance)
+    return all(
+        (start[0] + k * direction[0], start[1] + k * direction[1]) not in pieces
+        for k in range(1, distance)
+    )
+
+
+def _capture_chain_exists(state, start, end, removed, piece):
+    """
+    Whether the piece on `start` (1 soldier, 2 general, 3 king) can reach `end` by a
+    chain of jumps capturing exactly the `removed` squares, with the movement rules of
+    FenixState: captured pieces stay on the board until the end of the move (they can
+    neither be jumped twice nor landed on), and so does the moving piece on `start`.
+    """
+    pieces = state.pieces
+    rows, cols = state.dim
+    directions = KING_DIRECTIONS if piece == 3 else ORTHOGONAL_DIRECTIONS
+    stack = [(start, frozenset())]
+    seen = set()
+    while stack:
+        position, taken = stack.pop()
+        if taken == removed:
+            if position == end:
+                return True
+            continue
+        if (position, taken) in seen:
+            continue
+        seen.add((position, taken))
+        for di, dj in directions:
+            if piece != 2:
+                jumped = (position[0] + di, position[1] + dj)
+                landing = (position[0] + 2 * di, position[1] + 2 * dj)
+                if (jumped in removed and jumped not in taken
+                        and 0 <= landing[0] < rows and 0 <= landing[1] < cols and landing not in pieces):
+                    stack.append((landing, taken | {jumped}))
+                continue
+            # général : cases libres, une pièce adverse sautée, puis n'importe quelle case libre
+            row, col = position[0] + di, position[1] + dj
+            while 0 <= row < rows and 0 <= col < cols and (row, col) not in pieces:
+                row, col = row + di, col + dj
+            jumped = (row, col)
+            if jumped not in removed or jumped in taken:
+                continue
+            row, col = row + di, col + dj
+            while 0 <= row < rows and 0 <= col < cols and (row, col) not in pieces:
+                stack.append(((row, col), taken | {jumped}))
+                row, col = row + di, col + dj
+    return False
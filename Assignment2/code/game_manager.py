@@ -1,10 +1,12 @@
 import history_manager
 import fenix
+from fenix_utils import copy_state, apply_action, quick_check_action
+from search_stats import GameStatsRecorder
 import time
 from copy import deepcopy
 
 class TextGameManager:
-    def __init__(self, agent_1, agent_2, time_limit=300, display=True):
+    def __init__(self, agent_1, agent_2, time_limit=300, display=True, stats_path=None, strict=True):
         self.agent_1 = agent_1
         self.remaining_time_1 = time_limit
 
@@ -14,7 +16,25 @@ class TextGameManager:
         self.dim = (7, 8)
         self.display = display
 
+        # strict : copie profonde pour l'agent et validation complète (state.actions()) ;
+        # sinon (agents de confiance) copie légère, contrôle en temps constant et coup joué sur place
+        self.strict = strict
+
+        # statistiques de recherche par coup (agents qui exposent last_stats), une ligne JSON par partie
+        self.stats = GameStatsRecorder(stats_path)
+
     def play(self):
+        try:
+            results = self._play()
+            self.stats.save(self.agent_1, self.agent_2, results[0])
+            return results
+        finally:
+            # fin de partie : les agents libèrent leurs ressources / écrivent leurs profils
+            for agent in (self.agent_1, self.agent_2):
+                if hasattr(agent, "close"):
+                    agent.close()
+
+    def _play(self):
         state = fenix.FenixState()
 
         if self.display:
@@ -28,13 +48,17 @@ class TextGameManager:
             agent, remaining_time = (self.agent_1, self.remaining_time_1) if state.current_player == 1 else (self.agent_2, self.remaining_time_2)
 
             action = None
-            copy_state = deepcopy(state)
+            snapshot = deepcopy(state) if self.strict else copy_state(state)
             start_time = time.perf_counter()
-            action = agent.act(copy_state, remaining_time)
+            action = agent.act(snapshot, remaining_time)
             remaining_time -= time.perf_counter() - start_time
+            self.stats.record(agent, current_player)
 
-            valid_actions = state.actions()
-            if action not in valid_actions:
+            if self.strict:
+                valid = action in state.actions()
+            else:
+                valid = quick_check_action(state, action)
+            if not valid:
                 if self.display:
                     print(f"Invalid action: {action}")
                     print()
@@ -43,7 +67,10 @@ class TextGameManager:
                     print(f"Player -1 score: {-1 if state.to_move() == -1 else 1}")
                 return -1 if state.to_move() == 1 else 1, -1 if state.to_move() == -1 else 1
 
-            state = state.result(action)
+            if self.strict:
+                state = state.result(action)
+            else:
+                apply_action(state, action)
             if self.display:
                 print(f"========== Turn: {turn+1:3} ==========")
                 print(f"\nChosen action: {action}\n")
@@ -75,8 +102,12 @@ class TextGameManager:
 
 
 if __name__ == "__main__":
+    import logging
     import agent
     import past_agents
+    from search_log import configure_logging
+
+    configure_logging(logging.INFO)
 
     currentAgent = agent.Agent(player=1, depth=3)
     lastBestAgent = past_agents.all_agents[-1](player=-1, depth=3)
@@ -0,0 +1,98 @@
+import fenix
+from fenix_utils import copy_state
+from search_stats import GameStatsRecorder
+import time
+
+
+class HeadlessGameManager:
+    """
+    A game manager without display, for batch training: no pygame, no frame loop and no
+    minimum play time. The rules of VisualGameManager are kept (a move that empties the
+    clock is still played, and the game ends on a terminal state first, then on time),
+    and play() returns the same data.
+
+    Attributes:
+        red_agent (object): The AI agent for the red player.
+        black_agent (object): The AI agent for the black player.
+        total_time (int): Total time available for each player in seconds.
+    """
+
+    def __init__(self, red_agent, black_agent, total_time=300, stats_path=None):
+        """
+        Args:
+            red_agent (object): AI agent for the red player.
+            black_agent (object): AI agent for the black player.
+            total_time (int, optional): Total time per player in seconds (default: 300).
+            stats_path (str, optional): File where the agents' per-move search statistics are
+                appended, one JSON line per game (default: None, not saved).
+        """
+        self.red_agent = red_agent
+        self.black_agent = black_agent
+        self.total_time = total_time
+
+        self.state = fenix.FenixState()
+        self.winner = None
+
+        self.remaining_time_red = total_time
+        self.remaining_time_black = total_time
+        self.used_time_red = 0
+        self.used_time_black = 0
+
+        self.total_moves_red = 0
+        self.total_moves_black = 0
+
+        self.stats = GameStatsRecorder(stats_path)
+
+    def _check_end(self):
+        if self.state.is_terminal():
+            self.winner = self.state.utility(1)
+        elif self.remaining_time_red <= 0:
+            self.remaining_time_red = 0
+            self.winner = -1  # Rouge perd par dépassement de temps
+        elif self.remaining_time_black <= 0:
+            self.remaining_time_black = 0
+            self.winner = 1  # Noir perd par dépassement de temps
+        return self.winner is not None
+
+    def _play_move(self):
+        player = self.state.current_player
+        agent = self.red_agent if player == 1 else self.black_agent
+        remaining_time = self.remaining_time_red if player == 1 else self.remaining_time_black
+
+        # le temps compté est exactement celui de l'appel à act
+        start = time.perf_counter()
+        action = agent.act(copy_state(self.state), remaining_time)
+        elapsed = time.perf_counter() - start
+        self.stats.record(agent, player)
+
+        if player == 1:
+            self.remaining_time_red = max(0, self.remaining_time_red - elapsed)
+            self.total_moves_red += 1
+        else:
+            self.remaining_time_black = max(0, self.remaining_time_black - elapsed)
+            self.total_moves_black += 1
+
+        if action not in self.state.actions():
+            raise ValueError("Invalid action")
+        self.state = self.state.result(action)
+
+    def play(self):
+        """
+        Plays the game to the end.
+
+        Returns:
+            list: [winner, total_moves_red, total_moves_black, used_time_red, used_time_black],
+                as VisualGameManager.play.
+        """
+        try:
+            while not self._check_end():
+                self._play_move()
+        finally:
+            for agent in (self.red_agent, self.black_agent):
+                if hasattr(agent, "close"):
+                    agent.close()
+
+        self.used_time_red = self.total_time - self.remaining_time_red
+        self.used_time_black = self.total_time - self.remaining_time_black
+        self.stats.save(self.red_agent, self.black_agent, self.winner)
+        return [self.winner, self.total_moves_red, self.total_moves_black, self.used_time_red, self.used_time_black]
@@ -0,0 +1,931 @@
+"""
+Monte Carlo tree search (UCT) for Fenix, used by past_agents.AlphaBeta_MCTS.
+"""
+import math
+import multiprocessing
+import queue
+import random
+import time
+from array import array
+
+import numpy as np
+
+from fenix_utils import (
+    position_key, encode_state, decode_state, encode_action, decode_action, copy_state, apply_action,
+)
+
+
+def uniform_prior(state, action):
+    """
+    Unnormalized prior of a move: the same for every move, so PUCT explores evenly.
+    Weighting by the captured units would change nothing: FenixState.actions only
+    returns the moves capturing the maximum number of units.
+    """
+    return 1.0
+
+
+def random_playout(state, moves=None):
+    """
+    Plays random moves until the end of the game; returns the reward of player 1.
+    If `moves` is a list, the (player, action) pairs played are appended to it.
+    """
+    while not state.is_terminal():
+        actions = state.actions()
+        if not actions:
+            break
+        action = random.choice(actions)
+        if moves is not None:
+            moves.append((state.current_player, action))
+        state = state.result(action)
+    return 0.5 * (1 + state.utility(1))
+
+
+def material_win_probability(state, scale=3.0):
+    """Win probability of player 1 from the material balance (see material_win_probabilities)."""
+    return 1.0 / (1.0 + math.exp(-sum(state.pieces.values()) / scale))
+
+
+def bounded_playout(state, max_plies=20, scale=3.0, moves=None):
+    """
+    Fast playout on one scratch copy of `state`, played in place: captures of the king
+    are always taken, other moves are drawn uniformly (FenixState.actions already keeps
+    only the moves capturing the most units). After `max_plies` moves, the position is
+    scored by its material.
+
+    Args:
+        state (FenixState): The leaf position (not modified).
+        max_plies (int, optional): Maximum number of moves played (default: 20).
+        scale (float, optional): Scale of the material logistic curve (default: 3.0).
+        moves (list, optional): If given, the (player, action) pairs played are appended to it.
+
+    Returns:
+        float: Reward of player 1 in [0, 1].
+    """
+    state = copy_state(state)
+    for _ in range(max_plies):
+        if state.is_terminal():
+            return 0.5 * (1 + state.utility(1))
+        actions = state.actions()
+        if not actions:
+            break
+        pieces = state.pieces
+        action = None
+        for candidate in actions:
+            if any(abs(pieces[pos]) == 3 for pos in candidate.removed):
+                action = candidate
+                break
+        if action is None:
+            action = random.choice(actions)
+        if moves is not None:
+            moves.append((state.current_player, action))
+        apply_action(state, action)
+    if state.is_terminal():
+        return 0.5 * (1 + state.utility(1))
+    return material_win_probability(state, scale)
+
+
+# valeur d'une partie gagnée pour shallow_alphabeta (comme AlphaBeta._terminal_score)
+WIN_SCORE = 1000
+
+
+def material_score(state, player):
+    """Material balance for `player` (sum of the values of its pieces minus the opponent's)."""
+    return player * sum(state.pieces.values())
+
+
+def shallow_alphabeta(state, depth=2, max_extension=4, scale=3.0, evaluate=material_score, moves=None):
+    """
+    Scores a leaf by a shallow alpha-beta search instead of a playout: `depth` plies,
+    extended while the moves are captures (captures are forced in Fenix, so there is
+    no stand-pat) for at most `max_extension` more plies, with `evaluate` at the leaves.
+
+    Args:
+        state (FenixState): The leaf position (not modified).
+        depth (int, optional): Nominal depth, 1 or 2 (default: 2).
+        max_extension (int, optional): Maximum capture extension (default: 4).
+        scale (float, optional): Scale of the logistic curve mapping the score to a
+            win probability (default: 3.0).
+        evaluate (callable, optional): (state, player) -> score for player
+            (default: material_score).
+        moves (list, optional): Ignored (no playout moves for RAVE).
+
+    Returns:
+        float: Reward of player 1 in [0, 1].
+    """
+    value = _negamax(state, depth, max_extension, -math.inf, math.inf, evaluate)
+    if state.current_player != 1:
+        value = -value
+    return 1.0 / (1.0 + math.exp(max(min(-value / scale, 700.0), -700.0)))
+
+
+def _negamax(state, depth, extension, alpha, beta, evaluate):
+    # valeur du point de vue du joueur au trait
+    player = state.current_player
+    if state.is_terminal():
+        return WIN_SCORE * state.utility(player)
+    if depth <= 0 and extension <= 0:
+        return evaluate(state, player)
+    actions = state.actions()
+    if not actions:
+        return evaluate(state, player)
+    if depth <= 0:
+        # extension de captures uniquement
+        if not actions[0].removed:
+            return evaluate(state, player)
+        extension -= 1
+    else:
+        depth -= 1
+    best = -math.inf
+    for action in actions:
+        child = copy_state(state)
+        apply_action(child, action)
+        value = -_negamax(child, depth, extension, -beta, -alpha, evaluate)
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+    return best
+
+
+def material_win_probabilities(states, scale=3.0):
+    """
+    Vectorized static evaluation of a batch of states: the material balance of player 1
+    (sum of the signed piece values) mapped to a win probability by a logistic curve.
+
+    Args:
+        states (list of FenixState): The positions to score.
+        scale (float, optional): Material difference giving a probability of about 0.73.
+
+    Returns:
+        np.ndarray: Reward of player 1 in [0, 1] for each state.
+    """
+    boards = np.frombuffer(b"".join(encode_state(state)[0] for state in states), dtype=np.uint8)
+    # encode_state décale les valeurs de pièces de +3
+    material = (boards.reshape(len(states), -1).astype(np.int64) - 3).sum(axis=1)
+    return 1.0 / (1.0 + np.exp(-material / scale))
+
+
+def simulate_many(simulate, states):
+    """Batch version of a per-state leaf evaluation (for UCTSearch.evaluate_many)."""
+    return [simulate(state) for state in states]
+
+
+UNKNOWN = 2  # valeur de NodePool.proven tant que le résultat n'est pas prouvé
+NONE = -1
+
+
+class NodePool:
+    """
+    Search graph stored in preallocated parallel arrays, with a hard capacity.
+
+    Positions (nodes) and moves (edges) are split so that transpositions share one node.
+    The moves of a node are a linked list of edges (first_edge, then sibling), all created
+    at the node's first expansion; an edge whose child is NONE is not expanded yet.
+    States are not stored: the search replays the moves from the root state.
+
+    Node arrays: visits, value (sum of the rewards of the player who moved into the node),
+    first_edge, to_move (player to move), terminal, proven (1 win, 0 draw, -1 loss for the
+    same player as value, UNKNOWN otherwise), built (edges created), unexpanded (edges
+    without child), key (position_key) and allocated.
+    Edge arrays: move and removed (the two parts of fenix_utils.encode_action), prior,
+    child, sibling, amaf_visits and amaf_value (RAVE statistics of the move).
+
+    Attributes:
+        max_nodes, max_edges (int): Capacities (max_edges defaults to EDGES_PER_NODE
+            edges per node).
+        table (dict): Position key -> node, for the allocated nodes.
+        free_nodes, free_edges (array): Stacks of free indices.
+    """
+
+    # une expansion réserve tous les coups du nœud : ~17-20 en milieu de partie, plus
+    # autour du tour 10 (mesuré sur des parties aléatoires)
+    EDGES_PER_NODE = 20
+
+    def __init__(self, max_nodes=1 << 15, max_edges=None):
+        max_edges = self.EDGES_PER_NODE * max_nodes if max_edges is None else max_edges
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+
+        self.visits = array("q", bytes(8 * max_nodes))
+        self.value = array("d", bytes(8 * max_nodes))
+        self.first_edge = array("q", [NONE]) * max_nodes
+        self.to_move = array("b", bytes(max_nodes))
+        self.terminal = array("b", bytes(max_nodes))
+        self.proven = array("b", [UNKNOWN]) * max_nodes
+        self.built = array("b", bytes(max_nodes))
+        self.unexpanded = array("q", bytes(8 * max_nodes))
+        self.key = array("Q", bytes(8 * max_nodes))
+        self.allocated = array("b", bytes(max_nodes))
+
+        self.move = array("q", bytes(8 * max_edges))
+        self.removed = array("Q", bytes(8 * max_edges))
+        self.prior = array("d", bytes(8 * max_edges))
+        self.child = array("q", [NONE]) * max_edges
+        self.sibling = array("q", [NONE]) * max_edges
+        self.amaf_visits = array("q", bytes(8 * max_edges))
+        self.amaf_value = array("d", bytes(8 * max_edges))
+
+        self.clear()
+
+    def clear(self):
+        """Frees every node and edge."""
+        self.table = {}
+        self.allocated = array("b", bytes(self.max_nodes))
+        self.free_nodes = self._stack(self.max_nodes)
+        self.free_edges = self._stack(self.max_edges)
+
+    @staticmethod
+    def _stack(size):
+        # pile d'indices libres (le plus petit en haut), construite par NumPy
+        stack = array("q")
+        stack.frombytes(np.arange(size - 1, -1, -1, dtype=np.int64).tobytes())
+        return stack
+
+    def __len__(self):
+        return len(self.table)
+
+    def alloc_node(self, state, key):
+        """Allocates the node of `state` (NONE if the pool is full)."""
+        if not self.free_nodes:
+            return NONE
+        node = self.free_nodes.pop()
+        terminal = state.is_terminal()
+        self.visits[node] = 0
+        self.value[node] = 0.0
+        self.first_edge[node] = NONE
+        self.to_move[node] = state.current_player
+        self.terminal[node] = terminal
+        self.proven[node] = state.utility(-state.current_player) if terminal else UNKNOWN
+        self.built[node] = 0
+        self.unexpanded[node] = 0
+        self.key[node] = key
+        self.allocated[node] = 1
+        self.table[key] = node
+        return node
+
+    def build_edges(self, node, actions, priors):
+        """Creates the edges of all the moves of `node`; False if the pool is full."""
+        if len(self.free_edges) < len(actions):
+            return False
+        previous = NONE
+        for action, prior in zip(reversed(actions), reversed(priors)):
+            edge = self.free_edges.pop()
+            self.move[edge], self.removed[edge] = encode_action(action)
+            self.prior[edge] = prior
+            self.child[edge] = NONE
+            self.sibling[edge] = previous
+            self.amaf_visits[edge] = 0
+            self.amaf_value[edge] = 0.0
+            previous = edge
+        self.first_edge[node] = previous
+        self.unexpanded[node] = len(actions)
+        self.built[node] = 1
+        return True
+
+    def edges(self, node):
+        edge = self.first_edge[node]
+        sibling = self.sibling
+        while edge != NONE:
+            yield edge
+            edge = sibling[edge]
+
+    def action(self, edge):
+        return decode_action((self.move[edge], self.removed[edge]))
+
+    def reachable(self, root):
+        """Set of the nodes reachable from `root`."""
+        seen = {root}
+        stack = [root]
+        child = self.child
+        while stack:
+            for edge in self.edges(stack.pop()):
+                node = child[edge]
+                if node != NONE and node not in seen:
+                    seen.add(node)
+                    stack.append(node)
+        return seen
+
+    def sweep(self, keep):
+        """Frees every allocated node that is not in `keep`, with its edges."""
+        allocated = np.frombuffer(self.allocated, dtype=np.int8).nonzero()[0]
+        freed = 0
+        for node in allocated.tolist():
+            if node in keep:
+                continue
+            for edge in self.edges(node):
+                self.free_edges.append(edge)
+            if self.table.get(self.key[node]) == node:
+                del self.table[self.key[node]]
+            self.allocated[node] = 0
+            self.free_nodes.append(node)
+            freed += 1
+        return freed
+
+    def recycle(self, root):
+        """
+        Makes room when the pool is full: the subtrees of the least visited nodes (at or
+        below the median, root children excepted) are detached, their edges becoming
+        unexpanded again, then every node no longer reachable from the root is freed.
+
+        Returns:
+            int: Number of nodes freed.
+        """
+        keep = self.reachable(root)
+        protected = {root}
+        protected.update(self.child[edge] for edge in self.edges(root))
+        candidates = [node for node in keep if node not in protected]
+        if not candidates:
+            return self.sweep(keep)
+        threshold = float(np.median([self.visits[node] for node in candidates]))
+        child = self.child
+        for node in keep:
+            if node == root:
+                continue
+            for edge in self.edges(node):
+                target = child[edge]
+                if target != NONE and target not in protected and self.visits[target] <= threshold:
+                    child[edge] = NONE
+                    self.unexpanded[node] += 1
+        return self.sweep(self.reachable(root))
+
+
+class UCTSearch:
+    """
+    UCT search: selection with UCB1 or PUCT, expansion of one child per iteration,
+    simulation, and backpropagation of the reward with each node's own point of view.
+    The graph lives in a NodePool of bounded size: when it is full, the least visited
+    subtrees are recycled, so memory stays flat over a whole game.
+
+    The search keeps its graph between moves: set_root promotes the node of the new
+    position, if it was reached, and drops everything that is no longer reachable.
+    Nodes are merged by position key, so transpositions share their statistics.
+
+    With batch_size > 1, each step descends batch_size times before scoring anything,
+    with a virtual loss on every node of the paths (its visit is counted at once, its
+    reward only at backup), so that the descents spread out; the leaves are then scored
+    by one call to evaluate_many and all the rewards are backed up together.
+
+    The search is also a solver: terminal nodes are proven, and a node is proven as
+    soon as one move wins for the player to move (a loss for the player who moved into
+    it), or once all its moves are expanded and proven (the best one for the player to
+    move). Proven children are not selected anymore, and the search stops as soon as
+    the root is proven.
+
+    With rave_equivalence > 0, every node also keeps all-moves-as-first statistics: each
+    simulation counts, at a node, for every legal move that the player to move there
+    played later in the path or the playout. The value used for selection blends the
+    child's value with the AMAF value of its move, with weight
+    beta = sqrt(k / (3 n + k)), k = rave_equivalence, n = child visits.
+
+    Attributes:
+        simulate (callable): state -> reward of player 1 in [0, 1] (1 win, 0.5 draw, 0 loss).
+        batch_size (int): Leaves collected per step.
+        evaluate_many (callable): list of states -> rewards of player 1, for batched steps.
+        rave_equivalence (float): Visits at which UCT and AMAF values weigh about the same
+            (0: RAVE off).
+        exploration (float): Exploration constant c.
+        selection (str): "ucb1" or "puct".
+        prior (callable): (state, action) -> unnormalized prior, for PUCT (default:
+            uniform_prior, i.e. unweighted exploration).
+        pool (NodePool): The search graph.
+        root (int): Current root node (NONE before the first set_root).
+        root_state (FenixState): State of the root.
+        iterations (int): Iterations run by the last call to run().
+        recycled (int): Nodes freed by recycling during the last call to run().
+    """
+
+    # arêtes libres exigées par descente avant chaque étape (sinon recyclage)
+    EDGE_RESERVE = 64
+
+    def __init__(self, simulate, exploration=1.4, selection="ucb1", prior=uniform_prior,
+                 batch_size=1, evaluate_many=material_win_probabilities, rave_equivalence=0,
+                 max_nodes=1 << 15, max_edges=None):
+        if selection not in ("ucb1", "puct"):
+            raise ValueError(f"Unknown selection: {selection}")
+        self.simulate = simulate
+        self.exploration = exploration
+        self.selection = selection
+        self.prior = prior
+        self.batch_size = batch_size
+        self.evaluate_many = evaluate_many
+        self.rave_equivalence = rave_equivalence
+        self.pool = NodePool(max_nodes, max_edges)
+        self.root = NONE
+        self.root_state = None
+        self.iterations = 0
+        self.recycled = 0
+
+    def set_root(self, state, reuse=True):
+        """
+        Makes `state` the root of the search.
+
+        Args:
+            state (FenixState): The position to search.
+            reuse (bool, optional): Keep the subgraph of `state` if it was already
+                explored (default: True).
+
+        Returns:
+            int: The root node.
+        """
+        pool = self.pool
+        key = position_key(state)
+        node = pool.table.get(key, NONE) if reuse else NONE
+        if node != NONE and pool.built[node] and not self._edges_match(node, state):
+            # collision de clés : l'arbre gardé n'est pas celui de cette position
+            node = NONE
+        self.root_state = state
+        if node == NONE:
+            pool.clear()
+            self.root = pool.alloc_node(state, key)
+            return self.root
+        # l'état réel fixe le statut terminal (même position, historique exact)
+        if state.is_terminal():
+            pool.terminal[node] = 1
+            pool.proven[node] = state.utility(-state.current_player)
+        elif pool.terminal[node]:
+            # terminal seulement par l'historique de l'autre chemin (répétition)
+            pool.terminal[node] = 0
+            pool.proven[node] = UNKNOWN
+        self.root = node
+        pool.sweep(pool.reachable(node))
+        return node
+
+    def _edges_match(self, node, state):
+        """True if the edges of `node` are exactly the legal moves of `state`."""
+        pool = self.pool
+        kept = {(pool.move[edge], pool.removed[edge]) for edge in pool.edges(node)}
+        return kept == {encode_action(action) for action in state.actions()}
+
+    # itérations entre deux appels au critère d'arrêt de run
+    STOP_CHECK = 64
+
+    def run(self, root, end_time, clock, should_stop=None):
+        """
+        Runs iterations from `root` until `clock()` reaches `end_time`, at least one
+        (so that the root has an expanded child even if the deadline has already passed).
+
+        Args:
+            root (int): Root node (set by set_root).
+            end_time (float): Deadline, in the time base of `clock`.
+            clock (callable): Time function (e.g. time.time).
+            should_stop (callable, optional): (search, root) -> bool, checked every
+                STOP_CHECK iterations to end the search early.
+
+        Returns:
+            int: The root.
+        """
+        pool = self.pool
+        self.iterations = 0
+        self.recycled = 0
+        next_check = self.STOP_CHECK
+        while (self.iterations == 0 or clock() < end_time) and pool.proven[root] == UNKNOWN:
+            if should_stop is not None and self.iterations >= next_check:
+                next_check += self.STOP_CHECK
+                if should_stop(self, root):
+                    break
+            if (len(pool.free_nodes) <= self.batch_size
+                    or len(pool.free_edges) < self.batch_size * self.EDGE_RESERVE):
+                self.recycled += pool.recycle(root)
+            if self.batch_size > 1:
+                self.iterate_batch(root)
+                self.iterations += self.batch_size
+            else:
+                self.iterate(root)
+                self.iterations += 1
+        return root
+
+    def iterate(self, root):
+        path, moves, state = self._descend(root)
+        leaf = path[-1]
+        if self.pool.proven[leaf] != UNKNOWN:
+            reward = self._proven_reward(leaf)
+        elif self.rave_equivalence:
+            playout = []
+            reward = self.simulate(state, moves=playout)
+            moves += [(player, *encode_action(action)) for player, action in playout]
+        else:
+            reward = self.simulate(state)
+        self.backup(path, reward)
+        self._propagate_proof(path)
+        if self.rave_equivalence:
+            self._update_amaf(path, moves, reward)
+
+    def iterate_batch(self, root):
+        pool = self.pool
+        paths = []
+        tree_moves = []
+        states = []
+        for _ in range(self.batch_size):
+            path, moves, state = self._descend(root)
+            # perte virtuelle : la visite compte dès maintenant, la récompense au backup
+            for node in path:
+                pool.visits[node] += 1
+            paths.append(path)
+            tree_moves.append(moves)
+            states.append(state)
+
+        # Évaluation groupée des feuilles dont le résultat n'est pas prouvé
+        rewards = [
+            None if pool.proven[path[-1]] == UNKNOWN else self._proven_reward(path[-1]) for path in paths
+        ]
+        pending = [i for i, reward in enumerate(rewards) if reward is None]
+        if pending:
+            for i, reward in zip(pending, self.evaluate_many([states[i] for i in pending])):
+                rewards[i] = float(reward)
+
+        for path, moves, reward in zip(paths, tree_moves, rewards):
+            self.backup(path, reward, visited=True)
+            self._propagate_proof(path)
+            if self.rave_equivalence:
+                self._update_amaf(path, moves, reward)
+
+    def _expandable(self, node):
+        pool = self.pool
+        return not pool.terminal[node] and (not pool.built[node] or pool.unexpanded[node] > 0)
+
+    def _descend(self, root):
+        """
+        Selection and expansion, replaying the moves on a copy of the root state.
+
+        Returns:
+            tuple: (path of nodes from the root to the leaf, (player, move, removed) of the
+                moves along it, state of the leaf).
+        """
+        pool = self.pool
+        state = copy_state(self.root_state)
+        node = root
+        path = [root]
+        moves = []
+        on_path = {root}
+
+        # Sélection parmi les coups non prouvés (arrêt si une position se répète sur le chemin)
+        while not self._expandable(node) and pool.built[node]:
+            edge = self.select_child(node)
+            if edge == NONE:
+                break
+            child = pool.child[edge]
+            if child in on_path:
+                break
+            moves.append((pool.to_move[node], pool.move[edge], pool.removed[edge]))
+            apply_action(state, pool.action(edge))
+            path.append(child)
+            on_path.add(child)
+            node = child
+
+        # Expansion
+        if self._expandable(node):
+            edge, child, child_state = self.expand(node, state)
+            if edge != NONE and child not in on_path:
+                moves.append((pool.to_move[node], pool.move[edge], pool.removed[edge]))
+                path.append(child)
+                state = child_state
+        return path, moves, state
+
+    def expand(self, node, state):
+        """
+        Expands one unexpanded move of `node` (whose state is `state`).
+
+        Returns:
+            tuple: (edge, child node, child state), or (NONE, NONE, None) if the node has
+                no move or the pool is full.
+        """
+        pool = self.pool
+        if not pool.built[node]:
+            actions = state.actions()
+            if not actions:
+                return NONE, NONE, None
+            random.shuffle(actions)
+            weights = [self.prior(state, action) for action in actions]
+            total = sum(weights)
+            if not pool.build_edges(node, actions, [weight / total for weight in weights]):
+                return NONE, NONE, None
+        edge = next(e for e in pool.edges(node) if pool.child[e] == NONE)
+        child_state = copy_state(state)
+        apply_action(child_state, pool.action(edge))
+        key = position_key(child_state)
+        child = pool.table.get(key, NONE)
+        if child == NONE:
+            child = pool.alloc_node(child_state, key)
+            if child == NONE:
+                return NONE, NONE, None
+        pool.child[edge] = child
+        pool.unexpanded[node] -= 1
+        return edge, child, child_state
+
+    def select_child(self, node):
+        """Best unproven child edge by UCB1 or PUCT (NONE if all children are proven)."""
+        pool = self.pool
+        c = self.exploration
+        ucb1 = self.selection == "ucb1"
+        if ucb1:
+            log_n = math.log(max(pool.visits[node], 1))
+        else:
+            sqrt_n = math.sqrt(pool.visits[node])
+        best = NONE
+        best_score = -math.inf
+        for edge in pool.edges(node):
+            child = pool.child[edge]
+            if child == NONE or pool.proven[child] != UNKNOWN:
+                continue
+            visits = pool.visits[child]
+            if ucb1:
+                if visits == 0:
+                    return edge
+                score = self._value(edge, child) + c * math.sqrt(log_n / visits)
+            else:
+                score = self._value(edge, child) + c * pool.prior[edge] * sqrt_n / (1 + visits)
+            if score > best_score:
+                best = edge
+                best_score = score
+        return best
+
+    def _value(self, edge, child):
+        """Mean value of a child, blended with the AMAF value of its move when RAVE is on."""
+        pool = self.pool
+        visits = pool.visits[child]
+        q = pool.value[child] / visits if visits else 0.5
+        if self.rave_equivalence:
+            amaf_visits = pool.amaf_visits[edge]
+            if amaf_visits:
+                k = self.rave_equivalence
+                beta = math.sqrt(k / (3 * visits + k))
+                q = (1 - beta) * q + beta * pool.amaf_value[edge] / amaf_visits
+        return q
+
+    def _update_amaf(self, path, moves, reward):
+        # moves[i] est le coup joué depuis path[i] ; les coups au-delà de path sont ceux
+        # de la simulation. Chaque nœud compte, une fois, chaque coup joué plus tard par
+        # le joueur au trait chez lui.
+        pool = self.pool
+        played = {1: set(), -1: set()}
+        for player, move, removed in moves[len(path) - 1:]:
+            played[player].add((move, removed))
+        for i in range(len(path) - 1, -1, -1):
+            if i < len(moves):
+                player, move, removed = moves[i]
+                played[player].add((move, removed))
+            node = path[i]
+            if not pool.built[node]:
+                continue
+            player = pool.to_move[node]
+            result = reward if player == 1 else 1 - reward
+            for edge in pool.edges(node):
+                if (pool.move[edge], pool.removed[edge]) in played[player]:
+                    pool.amaf_visits[edge] += 1
+                    pool.amaf_value[edge] += result
+
+    def backup(self, path, reward, visited=False):
+        # reward est du point de vue du joueur 1 : chaque nœud le prend du point de vue
+        # du joueur qui a joué le coup menant à lui (visited : visites déjà comptées
+        # par la perte virtuelle)
+        pool = self.pool
+        for node in path:
+            if not visited:
+                pool.visits[node] += 1
+            pool.value[node] += reward if pool.to_move[node] == -1 else 1 - reward
+
+    def _proven_reward(self, node):
+        # résultat prouvé (point de vue de celui qui a joué) converti en récompense du joueur 1
+        return 0.5 * (1 - self.pool.proven[node] * self.pool.to_move[node])
+
+    def _solve(self, node):
+        """Tries to prove `node` from its children; returns whether it is now proven."""
+        pool = self.pool
+        best = None
+        unresolved = not pool.built[node] or pool.unexpanded[node] > 0
+        for edge in pool.edges(node):
+            child = pool.child[edge]
+            if child == NONE:
+                unresolved = True
+                continue
+            proven = pool.proven[child]
+            if proven == 1:
+                # un coup gagnant pour le joueur au trait : défaite pour celui qui a joué avant
+                pool.proven[node] = -1
+                return True
+            if proven == UNKNOWN:
+                unresolved = True
+            else:
+                best = proven if best is None else max(best, proven)
+        if unresolved or best is None:
+            return False
+        pool.proven[node] = -best
+        return True
+
+    def _propagate_proof(self, path):
+        if self.pool.proven[path[-1]] == UNKNOWN:
+            return
+        for node in reversed(path[:-1]):
+            if self.pool.proven[node] != UNKNOWN or not self._solve(node):
+                return
+
+    def child_stats(self, edge):
+        """(visits, value, proven result or None) of the child of an expanded edge."""
+        pool = self.pool
+        child = pool.child[edge]
+        proven = pool.proven[child]
+        return pool.visits[child], pool.value[child], None if proven == UNKNOWN else proven
+
+    def best_child(self, root):
+        """
+        Edge of the root's move: a proven win if there is one, else the most visited
+        child that is not a proven loss (NONE if no child is expanded).
+        """
+        pool = self.pool
+        edges = [edge for edge in pool.edges(root) if pool.child[edge] != NONE]
+        if not edges:
+            return NONE
+        for edge in edges:
+            if pool.proven[pool.child[edge]] == 1:
+                return edge
+        candidates = [edge for edge in edges if pool.proven[pool.child[edge]] != -1] or edges
+        return max(candidates, key=lambda e: pool.visits[pool.child[e]])
+
+    def root_statistics(self):
+        """Visits, value and proven result of each expanded root move, keyed by encode_action."""
+        pool = self.pool
+        return {
+            (pool.move[edge], pool.removed[edge]): self.child_stats(edge)
+            for edge in pool.edges(self.root) if pool.child[edge] != NONE
+        }
+
+
+class TimeManager:
+    """
+    Per-move time budget of an MCTS agent, from its remaining clock.
+
+    The budget is the usable clock (remaining time minus a safety margin) divided by an
+    estimate of the moves left, which shrinks with the number of pieces on the board,
+    and capped at max_share of the usable clock. During the search, should_stop ends
+    it early once the most visited root move cannot be overtaken by the iterations left
+    at the current rate, or, after min_fraction of the budget, once it holds more than
+    `dominance` of the root visits.
+
+    Attributes:
+        min_moves_left (float): Moves left estimated when the board is nearly empty.
+        moves_per_piece (float): Additional moves left per piece on the board.
+        safety_margin (float): Seconds of the clock never spent.
+        max_share (float): Largest share of the usable clock spent on one move.
+        min_time (float): Smallest budget.
+        dominance (float): Share of the root visits that makes a move clearly best.
+        min_fraction (float): Share of the budget spent before the dominance test applies.
+        budget (float): Budget of the current move.
+    """
+
+    def __init__(self, min_moves_left=8, moves_per_piece=0.5, safety_margin=2.0, max_share=0.15,
+                 min_time=0.05, dominance=0.6, min_fraction=0.25):
+        self.min_moves_left = min_moves_left
+        self.moves_per_piece = moves_per_piece
+        self.safety_margin = safety_margin
+        self.max_share = max_share
+        self.min_time = min_time
+        self.dominance = dominance
+        self.min_fraction = min_fraction
+        self.budget = 0.0
+        self._start = 0.0
+        self._clock = time.time
+
+    def moves_left(self, state):
+        """Estimated number of moves the player still has to play."""
+        return self.min_moves_left + self.moves_per_piece * len(state.pieces)
+
+    def start(self, state, remaining_time, clock=time.time):
+        """
+        Starts timing a move.
+
+        Args:
+            state (FenixState): The position to play.
+            remaining_time (float): Seconds left on the player's clock.
+            clock (callable, optional): Time function (default: time.time).
+
+        Returns:
+            float: The deadline of the move, in the time base of `clock`.
+        """
+        usable = max(remaining_time - self.safety_margin, 0.0)
+        self.budget = max(self.min_time, min(usable / self.moves_left(state), self.max_share * usable))
+        self._clock = clock
+        self._start = clock()
+        return self._start + self.budget
+
+    def should_stop(self, search, root):
+        """Stability test, for UCTSearch.run."""
+        elapsed = self._clock() - self._start
+        if elapsed <= 0:
+            return False
+        pool = search.pool
+        first = second = total = 0
+        for edge in pool.edges(root):
+            child = pool.child[edge]
+            if child == NONE:
+                continue
+            visits = pool.visits[child]
+            total += visits
+            if visits > first:
+                first, second = visits, first
+            elif visits > second:
+                second = visits
+        # itérations encore possibles au rythme actuel
+        remaining = search.iterations / elapsed * (self.budget - elapsed)
+        if first - second > remaining:
+            return True
+        return elapsed >= self.min_fraction * self.budget and total > 0 and first >= self.dominance * total
+
+
+def merge_root_statistics(all_stats):
+    """
+    Sums per-move statistics of several independent searches of the same root.
+    A move proven winning by any search is chosen; moves proven losing are avoided.
+
+    Returns:
+        tuple: (chosen action, its summed visits, its summed value), or (None, 0, 0.0)
+            if no search expanded a root move.
+    """
+    totals = {}
+    proven = {}
+    for stats in all_stats:
+        for code, (visits, value, result) in stats.items():
+            total = totals.setdefault(code, [0, 0.0])
+            total[0] += visits
+            total[1] += value
+            if result is not None:
+                proven[code] = result
+    winning = [c for c in totals if proven.get(c) == 1]
+    candidates = winning or [c for c in totals if proven.get(c) != -1] or list(totals)
+    if not candidates:
+        return None, 0, 0.0
+    code = max(candidates, key=lambda c: totals[c][0])
+    visits, value = totals[code]
+    return decode_action(code), visits, value
+
+
+class RootParallelWorkers:
+    """
+    Persistent worker processes for root-parallel MCTS: each one builds its own tree
+    from the same root until the same deadline, and sends back its root statistics.
+    States and moves travel in the compact encodings of fenix_utils.
+
+    Args:
+        count (int): Number of processes.
+        simulate (callable): Simulation function of the workers' searches.
+        options (dict): Other keyword arguments of the workers' UCTSearch.
+        reuse (bool, optional): Workers keep their tree between moves (default: True).
+    """
+
+    def __init__(self, count, simulate, options, reuse=True):
+        self.tasks = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.seq = 0
+        self.procs = []
+        for _ in range(count):
+            proc = multiprocessing.Process(
+                target=_root_worker,
+                args=(simulate, options, reuse, self.tasks, self.results),
+                daemon=True,
+            )
+            proc.start()
+            self.procs.append(proc)
+
+    def submit(self, state, end_time):
+        """Envoie la position à chaque worker, avec l'échéance (horloge time.time)"""
+        self.seq += 1
+        encoded = encode_state(state)
+        for _ in self.procs:
+            self.tasks.put((self.seq, encoded, end_time))
+
+    def collect(self, timeout=5):
+        """Renvoie les (statistiques de la racine, itérations) reçues pour la dernière position"""
+        results = []
+        pending = len(self.procs)
+        while pending > 0:
+            try:
+                seq, stats, iterations = self.results.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if seq == self.seq:
+                pending -= 1
+                results.append((stats, iterations))
+        return results
+
+    def close(self):
+        for _ in self.procs:
+            self.tasks.put(None)
+        for proc in self.procs:
+            proc.join(timeout=1)
+        self.procs = []
+
+
+def _root_worker(simulate, options, reuse, tasks, results):
+    """Boucle d'un worker : un arbre indépendant (réutilisé d'un coup à l'autre) par position reçue"""
+    random.seed()  # graine propre à chaque processus (sinon hérité du parent par fork)
+    search = UCTSearch(simulate, **options)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, encoded, end_time = task
+        root = search.set_root(decode_state(encoded), reuse=reuse)
+        if not search.pool.terminal[root]:
+            search.run(root, end_time, time.time)
+        results.put((seq, search.root_statistics(), search.iterations))
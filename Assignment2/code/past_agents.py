@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
+import functools
 import math
 import time
 import random
-from collections import defaultdict
 import fenix
+import mcts
 from agent import Agent
+from search_log import get_logger
+
+log = get_logger("past_agents")
 
 
 class RandomAgent:
@@ -79,11 +83,42 @@ class AlphaBeta:
         return score
 
 class AlphaBeta_MCTS:
-    def __init__(self, player: int, depth: int = 3, method: str = 'mcts', time_limit: float = 1.5):
+    def __init__(self, player: int, depth: int = 3, method: str = 'mcts', time_limit: float = None,
+                 exploration: float = 1.4, selection: str = 'ucb1', reuse_tree: bool = True,
+                 workers: int = 1, batch_size: int = 1, rollout_plies: int = 20,
+                 rave_equivalence: float = 0, max_nodes: int = 1 << 15, max_edges: int = None,
+                 leaf_depth: int = None):
         self.player = player
         self.depth = depth
         self.method = method.lower()
+        # time_limit fixe le temps par coup ; sans lui, le budget vient de l'horloge restante
         self.time_limit = time_limit
+        self.time_manager = mcts.TimeManager()
+        self.reuse_tree = reuse_tree
+        # batch_size > 1 : feuilles collectées avec perte virtuelle puis évaluées ensemble,
+        # par la même simulation (rollout_plies, leaf_depth) qu'avec batch_size = 1
+        # rave_equivalence > 0 : statistiques AMAF mélangées aux valeurs UCT
+        # max_nodes, max_edges : taille fixe du graphe de recherche (recyclage quand il est
+        # plein) ; max_edges vaut par défaut NodePool.EDGES_PER_NODE arêtes par nœud
+        self.search_options = dict(exploration=exploration, selection=selection, batch_size=batch_size,
+                                   rave_equivalence=rave_equivalence, max_nodes=max_nodes,
+                                   max_edges=max_edges)
+        # simulations bornées à rollout_plies coups (None : parties aléatoires complètes)
+        # leaf_depth (1 ou 2) : mode hybride, les feuilles sont évaluées par un alpha-beta
+        # peu profond (avec extension des captures) et self.evaluate au lieu d'une simulation
+        self.leaf_depth = leaf_depth
+        if leaf_depth is not None:
+            self.simulate = functools.partial(mcts.shallow_alphabeta, depth=leaf_depth, evaluate=self.evaluate)
+        elif rollout_plies is None:
+            self.simulate = mcts.random_playout
+        else:
+            self.simulate = functools.partial(mcts.bounded_playout, max_plies=rollout_plies)
+        self.search_options["evaluate_many"] = functools.partial(mcts.simulate_many, self.simulate)
+        # graphe alloué au premier coup MCTS (inutile avec method='alpha-beta')
+        self.search = None
+        # MCTS parallèle à la racine : workers - 1 processus en plus de l'arbre principal
+        self.workers = workers
+        self._root_workers = None
 
     def __str__(self):
         return "AlphaBeta_MCTS"
@@ -92,7 +127,7 @@ class AlphaBeta_MCTS:
         if self.method == 'alpha-beta':
             return self._act_alphabeta(state)
         elif self.method == 'mcts':
-            return self._act_mcts(state)
+            return self._act_mcts(state, remaining_time)
         else:
             raise ValueError(f"Unknown method: {self.method}")
 
@@ -158,7 +193,7 @@ class AlphaBeta_MCTS:
         return score
 
     # ---------- MCTS ----------
-    def _act_mcts(self, root_state):
+    def _act_mcts(self, root_state, remaining_time):
 
         if root_state.turn == 0:
             return fenix.FenixAction((0,1),(0,0), removed=frozenset())
@@ -169,56 +204,68 @@ class AlphaBeta_MCTS:
         if root_state.turn == 3:
             return fenix.FenixAction((6,6),(6,7), removed=frozenset())
 
-        stats = defaultdict(lambda: {"wins": 0, "visits": 0})
-        end_time = time.time() + self.time_limit
-        root_actions = root_state.actions()
-
-        if not root_actions:
+        # on repart du sous-arbre de la position réelle s'il a été exploré au coup précédent.
+        # L'horloge du coup démarre après set_root (le nettoyage du pool peut prendre plus
+        # que min_time), en décomptant le temps qu'il a pris
+        set_root_start = time.time()
+        if self.search is None:
+            self.search = mcts.UCTSearch(self.simulate, **self.search_options)
+        root = self.search.set_root(root_state, reuse=self.reuse_tree)
+        pool = self.search.pool
+        reused = pool.visits[root]
+
+        if pool.terminal[root] or not root_state.actions():
             raise Exception("No legal actions!")
 
-        while time.time() < end_time:
-            state = root_state
-            path = []
-            visited = set()
-
-            # Sélection & Expansion
-            while not state.is_terminal():
-                actions = state.actions()
-                if not actions:
-                    break
-                action = random.choice(actions)
-                path.append((state, action))
-                state = state.result(action)
-                h = hash(state)
-                if h not in stats:
-                    break  # on développe un nouveau nœud
-
-            # Simulation
-            winner = self._rollout(state)
-
-            # Backpropagation
-            for (s, a) in path:
-                h = hash(s)
-                stats[h]["visits"] += 1
-                if s.to_move() != winner:  # si c'était notre coup et on gagne
-                    stats[h]["wins"] += 1
-
-        # Choix final
-        best_action = max(root_actions, key=lambda a: stats[hash(root_state.result(a))]["wins"])
-        return best_action
-
-    def _rollout(self, state):
-        while not state.is_terminal():
-            actions = state.actions()
-            if not actions:
-                break
-            state = state.result(random.choice(actions))
-        util = state.utility(self.player)
-        if util > 0:
-            return self.player
-        elif util < 0:
-            return -self.player
-        return 0
+        should_stop = None
+        if self.time_limit is not None:
+            end_time = time.time() + self.time_limit
+        else:
+            remaining_time -= time.time() - set_root_start
+            end_time = self.time_manager.start(root_state, remaining_time)
+            # arrêt anticipé si un coup domine (inutile avec des workers qui tournent jusqu'à l'échéance)
+            if self.workers <= 1:
+                should_stop = self.time_manager.should_stop
+            log.debug("MCTS : budget de %.2f s (%.1f s restantes)", self.time_manager.budget, remaining_time)
+
+        if self.workers > 1 and self._root_workers is None:
+            self._root_workers = mcts.RootParallelWorkers(
+                self.workers - 1, self.simulate, self.search_options, self.reuse_tree,
+            )
+        if self._root_workers is not None:
+            self._root_workers.submit(root_state, end_time)
+
+        self.search.run(root, end_time, time.time, should_stop)
+
+        if self._root_workers is not None:
+            results = self._root_workers.collect()
+            all_stats = [self.search.root_statistics()] + [stats for stats, _ in results]
+            action, visits, value = mcts.merge_root_statistics(all_stats)
+            if action is None:
+                log.warning("MCTS parallèle : aucun coup développé, premier coup légal joué")
+                return root_state.actions()[0]
+            log.debug("MCTS parallèle : %s arbres, %s itérations, %s visites, taux de victoire %.3f",
+                      len(all_stats), self.search.iterations + sum(it for _, it in results),
+                      visits, value / visits)
+            return action
+
+        # Choix final : le coup le plus visité
+        best = self.search.best_child(root)
+        if best == mcts.NONE:
+            # aucun enfant développé (pool plein) : premier coup légal
+            log.warning("MCTS : aucun coup développé, premier coup légal joué")
+            return root_state.actions()[0]
+        visits, value, proven = self.search.child_stats(best)
+        log.debug("MCTS : %s itérations (%s simulations réutilisées), %s nœuds (%s recyclés), %s visites, taux de victoire %.3f, résultat prouvé %s",
+                  self.search.iterations, reused, len(pool), self.search.recycled,
+                  visits, value / visits, proven)
+        return pool.action(best)
+
+    def close(self):
+        # fin de partie (appelé par les gestionnaires de partie) : arrêt des workers MCTS
+        if self._root_workers is not None:
+            self._root_workers.close()
+            self._root_workers = None
 
 class AlphaBetaPlus:
     def __init__(self, player: int, depth: int = 3):
@@ -363,8 +410,123 @@ class AlphaBetaPlus:
         ]
         return openings[turn]
 
-class Alpha_variable_depth:
-    def __init__(self, player: int, depth: int = 3):
+class TaperedEvaluation:
+    """
+    Évaluation "tapered" pour les agents à poids early / mid / late.
+
+    La phase de jeu vient du matériel restant (somme des |pièces|) et non plus du n° de
+    tour : les poids sont interpolés entre les trois jeux de poids. Tout est précalculé
+    à la construction dans des tableaux plats : poids par quantité de matériel, et
+    valeur (matériel + bonus de case) par type de pièce et par case. L'évaluation devient
+    des lectures de tableaux et un produit scalaire.
+
+    Optionnelle (tapered=True) : par défaut les agents gardent leur évaluation d'origine,
+    celle des adversaires de référence de batch_training et game_manager.
+    """
+
+    FEATURES = ("pieces", "mobility", "king_safety", "king_threat", "captures")
+    PHASE_MATERIAL_MID = 28 #matériel (sur 42 au départ) où les poids "mid" s'appliquent
+    PHASE_MATERIAL_LATE = 14 #matériel à partir duquel les poids "late" s'appliquent
+    THREAT_OFFSETS = [
+        (dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+        if 0 < abs(dx) + abs(dy) <= 2
+    ]
+
+    def _init_tapered(self, tapered, square_bonus):
+        self.tapered = tapered
+        # square_bonus : {type de pièce (1, 2, 3): grille 7x8 de bonus}, aucun par défaut
+        self.square_bonus = square_bonus or {}
+        self._build_tables()
+
+    def _build_tables(self):
+        """(Re)calcule les tableaux, à appeler après toute modification de self.mult"""
+        state = fenix.FenixState()
+        rows, cols = state.dim
+        self._cols = cols
+        self._max_material = sum(abs(piece) for piece in state.pieces.values())
+
+        self._phase_weights = [
+            tuple(self._phase_weight(material, feature) for feature in self.FEATURES)
+            for material in range(self._max_material + 1)
+        ]
+
+        # _piece_square[joueur][(pièce + 3) * nb_cases + case] = signe * pièce² + bonus de case
+        self._piece_square = {}
+        for player in (1, -1):
+            table = [0.0] * (7 * rows * cols)
+            for piece in (-3, -2, -1, 1, 2, 3):
+                sign = 1 if piece * player > 0 else -1
+                bonus = self.square_bonus.get(abs(piece))
+                for row in range(rows):
+                    for col in range(cols):
+                        value = piece ** 2
+                        if bonus is not None:
+                            value += bonus[row][col]
+                        table[(piece + 3) * rows * cols + row * cols + col] = sign * value
+            self._piece_square[player] = table
+
+    def _phase_weight(self, material, feature):
+        # interpolation linéaire early -> mid -> late selon le matériel restant
+        early, mid, late = (self.mult[phase][feature] for phase in ("early", "mid", "late"))
+        if material >= self._max_material:
+            return early
+        if material >= self.PHASE_MATERIAL_MID:
+            t = (self._max_material - material) / (self._max_material - self.PHASE_MATERIAL_MID)
+            return early + (mid - early) * t
+        if material >= self.PHASE_MATERIAL_LATE:
+            t = (self.PHASE_MATERIAL_MID - material) / (self.PHASE_MATERIAL_MID - self.PHASE_MATERIAL_LATE)
+            return mid + (late - mid) * t
+        return late
+
+    def _evaluate_tapered(self, next_state, player):
+        table = self._piece_square[player]
+        size = len(table) // 7
+        cols = self._cols
+        pieces = next_state.pieces
+
+        material_score = 0
+        material = 0
+        my_king = None
+        opponent_king = None
+        for pos, piece in pieces.items():
+            material_score += table[(piece + 3) * size + pos[0] * cols + pos[1]]
+            material += abs(piece)
+            if piece == 3 * player:
+                my_king = pos
+            elif piece == -3 * player:
+                opponent_king = pos
+
+        king_safety = -10
+        if my_king is not None:
+            king_safety = 0
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if (dx or dy) and pieces.get((my_king[0] + dx, my_king[1] + dy), 0) * player > 0:
+                        king_safety += 1
+
+        king_threat = 0
+        if opponent_king is not None:
+            for dx, dy in self.THREAT_OFFSETS:
+                if pieces.get((opponent_king[0] + dx, opponent_king[1] + dy), 0) * player > 0:
+                    king_threat += 2
+
+        features = (
+            material_score,
+            self._mobility(next_state, player),
+            king_safety,
+            king_threat,
+            self._multiple_capture(next_state, player),
+        )
+        weights = self._phase_weights[min(material, self._max_material)]
+        total = 0
+        for value, weight in zip(features, weights):
+            total += value * weight
+
+        self.last_turn_scores.append(features)
+        return round(total, 5)
+
+class Alpha_variable_depth(TaperedEvaluation):
+    def __init__(self, player: int, depth: int = 3, tapered: bool = False, square_bonus=None):
         self.player = player
         self.depth = depth
         self.prev_actions = []
@@ -376,7 +538,7 @@ class Alpha_variable_depth:
             "mid": self._random_weights(),
             "late": self._random_weights(),
         }
-        print(f'Partie d\'analyse avec ces poids: {self.mult}')
+        log.info("Partie d'analyse avec ces poids: %s", self.mult)
 
         self.score_contributions = {
             "pieces": [],
@@ -386,6 +548,7 @@ class Alpha_variable_depth:
             "captures": [],
         }
         self.last_turn_scores = []
+        self._init_tapered(tapered, square_bonus)
 
     def _random_weights(self):
         return {
@@ -397,20 +560,21 @@ class Alpha_variable_depth:
         }
 
     def __str__(self):
-        return "Alpha_variable_depth2"
+        # nom distinct dans history.txt : l'évaluation tapered n'est pas celle de référence
+        return "Alpha_variable_depth2_tapered" if self.tapered else "Alpha_variable_depth2"
 
     def act(self, state, remaining_time):
-        print(f"=== Tour n°{state.turn} ===")
+        log.info("=== Tour n°%s ===", state.turn)
         if state.turn == self.thresh_midgame or state.turn == self.thresh_midgame + 1:
-            print(f"=== Passage en MidGame ===")
+            log.info("=== Passage en MidGame ===")
         if state.turn == self.thresh_lategame or state.turn == self.thresh_lategame + 1:
-            print(f"=== Passage en LateGame ===")
+            log.info("=== Passage en LateGame ===")
 
         if state.turn <= 9:
-            print(f"    Création des généraux et du roi (coin)")
+            log.info("    Création des généraux et du roi (coin)")
             opening_moves = self._opening(state.turn)
             if opening_moves:
-                print(f"        Coup final = {opening_moves}")
+                log.info("        Coup final = %s", opening_moves)
                 return opening_moves
 
         best_value = -math.inf
@@ -423,9 +587,7 @@ class Alpha_variable_depth:
         if remaining_time < 20 :
             more_depth = -1
 
-        print(
-            f"    Analyse des possibilités avec une profondeur de {self.depth - 1 + more_depth}"
-        )
+        log.info("    Analyse des possibilités avec une profondeur de %s", self.depth - 1 + more_depth)
         for action in self._ordered_actions(state):
             value = self._opponent_turn_min(
                 state,
@@ -442,23 +604,19 @@ class Alpha_variable_depth:
             ):
                 best_value = value
                 best_action = action
-                print(
-                    f"    Nouveau meilleur coup = {best_action} avec une valeur de {best_value}"
-                )
+                log.debug("    Nouveau meilleur coup = %s avec une valeur de %s", best_action, best_value)
 
         self.prev_actions.append(best_action)
         if len(self.prev_actions) > 10:
             self.prev_actions.pop(0)
 
-        print(
-            f"    Meilleur coup final = {best_action} avec une valeur de {best_value}"
-        )
+        log.info("    Meilleur coup final = %s avec une valeur de %s", best_action, best_value)
         return best_action
 
     # --- DEPTH CALCULATOR ---------------------------------------------------
 
     def depth_calculator(self, pieces: int, board: tuple, ini_time, remaining_time):
-        print(str(pieces) + " " + str(board))
+        log.debug("%s %s", pieces, board)
         ini_pieces = (board[0] - 1) * (board[1] - 1)
 
         depth = ini_pieces // pieces - 1
@@ -478,6 +636,9 @@ class Alpha_variable_depth:
     # --- ÉVALUATION ---------------------------------------------------------
 
     def evaluate(self, actual_state, next_state, player: int) -> float:
+        if self.tapered:
+            return self._evaluate_tapered(next_state, player)
+
         if next_state.turn < self.thresh_midgame:
             mult = self.mult["early"]
         elif next_state.turn < self.thresh_lategame:
@@ -497,15 +658,15 @@ class Alpha_variable_depth:
         for key in values:
             total += values[key] * mult[key]
 
-        self.last_turn_scores.append(values)
+        self.last_turn_scores.append(tuple(values.values()))
         return round(total, 5)
 
     def update_multipliers_after_game(self, won: bool):
         impact = 1.05 if won else 0.95
-        print(f"\n Ajout des poids — Victoire : {won}")
+        log.info("\n Ajout des poids — Victoire : %s", won)
 
         for scores in self.last_turn_scores:
-            for key, val in scores.items():
+            for key, val in zip(self.FEATURES, scores):
                 self.score_contributions[key].append(val)
 
         if self.last_turn_scores:
@@ -515,11 +676,12 @@ class Alpha_variable_depth:
                 )
                 adjustment = impact if avg_score > 0 else 1
                 self.mult["mid"][key] *= adjustment
-                print(f"    {key}: {self.mult['mid'][key]:.3f}")
+                log.info("    %s: %.3f", key, self.mult['mid'][key])
 
         self.last_turn_scores.clear()
         for key in self.score_contributions:
             self.score_contributions[key].clear()
+        self._build_tables()
         self.log_weights_to_file(won)
 
     def log_weights_to_file(self, won: bool, path="weights.txt"):
@@ -666,8 +828,8 @@ class Alpha_variable_depth:
         return openings[turn]
 
 
-class Alpha_no_depth:
-    def __init__(self, player: int, depth: int = 3):
+class Alpha_no_depth(TaperedEvaluation):
+    def __init__(self, player: int, depth: int = 3, tapered: bool = False, square_bonus=None):
         self.player = player
         self.depth = depth
         self.prev_actions = []
@@ -679,7 +841,7 @@ class Alpha_no_depth:
             "mid": self._random_weights(),
             "late": self._random_weights(),
         }
-        print(f'Partie d\'analyse avec ces poids: {self.mult}')
+        log.info("Partie d'analyse avec ces poids: %s", self.mult)
 
         self.score_contributions = {
             "pieces": [],
@@ -689,6 +851,7 @@ class Alpha_no_depth:
             "captures": [],
         }
         self.last_turn_scores = []
+        self._init_tapered(tapered, square_bonus)
 
     def _random_weights(self):
         return {
@@ -700,20 +863,21 @@ class Alpha_no_depth:
         }
 
     def __str__(self):
-        return "Alpha_no_depth2"
+        # nom distinct dans history.txt : l'évaluation tapered n'est pas celle de référence
+        return "Alpha_no_depth2_tapered" if self.tapered else "Alpha_no_depth2"
 
     def act(self, state, remaining_time):
-        print(f"=== Tour n°{state.turn} ===")
+        log.info("=== Tour n°%s ===", state.turn)
         if state.turn == self.thresh_midgame or state.turn == self.thresh_midgame + 1:
-            print(f"=== Passage en MidGame ===")
+            log.info("=== Passage en MidGame ===")
         if state.turn == self.thresh_lategame or state.turn == self.thresh_lategame + 1:
-            print(f"=== Passage en LateGame ===")
+            log.info("=== Passage en LateGame ===")
 
         if state.turn <= 9:
-            print(f"    Création des généraux et du roi (coin)")
+            log.info("    Création des généraux et du roi (coin)")
             opening_moves = self._opening(state.turn)
             if opening_moves:
-                print(f"        Coup final = {opening_moves}")
+                log.info("        Coup final = %s", opening_moves)
                 return opening_moves
 
         best_value = -math.inf
@@ -727,9 +891,7 @@ class Alpha_no_depth:
         if remaining_time < 20 :
             more_depth = -1
 
-        print(
-            f"    Analyse des possibilités avec une profondeur de {self.depth - 1 + more_depth}"
-        )
+        log.info("    Analyse des possibilités avec une profondeur de %s", self.depth - 1 + more_depth)
         for action in self._ordered_actions(state):
             value = self._opponent_turn_min(
                 state,
@@ -746,23 +908,19 @@ class Alpha_no_depth:
             ):
                 best_value = value
                 best_action = action
-                print(
-                    f"    Nouveau meilleur coup = {best_action} avec une valeur de {best_value}"
-                )
+                log.debug("    Nouveau meilleur coup = %s avec une valeur de %s", best_action, best_value)
 
         self.prev_actions.append(best_action)
         if len(self.prev_actions) > 10:
             self.prev_actions.pop(0)
 
-        print(
-            f"    Meilleur coup final = {best_action} avec une valeur de {best_value}"
-        )
+        log.info("    Meilleur coup final = %s avec une valeur de %s", best_action, best_value)
         return best_action
 
     # --- DEPTH CALCULATOR ---------------------------------------------------
 
     def depth_calculator(self, pieces: int, board: tuple, ini_time, remaining_time):
-        print(str(pieces) + " " + str(board))
+        log.debug("%s %s", pieces, board)
         ini_pieces = (board[0] - 1) * (board[1] - 1)
 
         depth = ini_pieces // pieces - 1
@@ -782,6 +940,9 @@ class Alpha_no_depth:
     # --- ÉVALUATION ---------------------------------------------------------
 
     def evaluate(self, actual_state, next_state, player: int) -> float:
+        if self.tapered:
+            return self._evaluate_tapered(next_state, player)
+
         if next_state.turn < self.thresh_midgame:
             mult = self.mult["early"]
         elif next_state.turn < self.thresh_lategame:
@@ -801,15 +962,15 @@ class Alpha_no_depth:
         for key in values:
             total += values[key] * mult[key]
 
-        self.last_turn_scores.append(values)
+        self.last_turn_scores.append(tuple(values.values()))
         return round(total, 5)
 
     def update_multipliers_after_game(self, won: bool):
         impact = 1.05 if won else 0.95
-        print(f"\n Ajout des poids — Victoire : {won}")
+        log.info("\n Ajout des poids — Victoire : %s", won)
 
         for scores in self.last_turn_scores:
-            for key, val in scores.items():
+            for key, val in zip(self.FEATURES, scores):
                 self.score_contributions[key].append(val)
 
         if self.last_turn_scores:
@@ -819,11 +980,12 @@ class Alpha_no_depth:
                 )
                 adjustment = impact if avg_score > 0 else 1
                 self.mult["mid"][key] *= adjustment
-                print(f"    {key}: {self.mult['mid'][key]:.3f}")
+                log.info("    %s: %.3f", key, self.mult['mid'][key])
 
         self.last_turn_scores.clear()
         for key in self.score_contributions:
             self.score_contributions[key].clear()
+        self._build_tables()
         self.log_weights_to_file(won)
 
     def log_weights_to_file(self, won: bool, path="weights.txt"):
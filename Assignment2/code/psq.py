@@ -0,0 +1,96 @@
+"""
+Piece-square tables stored as NumPy arrays, for single and batched evaluation.
+"""
+import numpy as np
+
+ROWS, COLS, TYPES = 7, 8, 3
+
+
+class PieceSquareTables:
+    """
+    Per-side, per-square, per-piece-type weights.
+
+    tables[side, row, col, type - 1] is the value of a piece of the given type on the given
+    square, side 0 being player 1 (red) and side 1 player -1 (black). The score of a position
+    for player 1 is the sum over red pieces minus the sum over black pieces, and its opposite
+    for player -1.
+
+    Attributes:
+        tables (np.ndarray): Array of shape (2, 7, 8, 3).
+        version (int): Fingerprint of the tables, used in evaluation cache keys.
+    """
+
+    SHAPE = (2, ROWS, COLS, TYPES)
+
+    def __init__(self, tables):
+        tables = np.asarray(tables, dtype=np.float64)
+        if tables.shape != self.SHAPE:
+            raise ValueError(f"Piece-square tables must have shape {self.SHAPE}, got {tables.shape}")
+        self.tables = tables
+        # tables signées : les pièces noires comptent négativement (point de vue du joueur 1)
+        self._signed = tables * np.array([1.0, -1.0])[:, None, None, None]
+        self.version = hash(tables.tobytes())
+
+    @classmethod
+    def zeros(cls):
+        return cls(np.zeros(cls.SHAPE))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads tables from a .npy file, or from the "tables" array of a .npz file.
+
+        Args:
+            path (str): Path of the file.
+        """
+        data = np.load(path)
+        if isinstance(data, np.lib.npyio.NpzFile):
+            with data:
+                return cls(data["tables"])
+        return cls(data)
+
+    def save(self, path):
+        """Saves the tables as a compressed .npz file (float32)."""
+        np.savez_compressed(path, tables=self.tables.astype(np.float32))
+
+    @staticmethod
+    def encode_boards(board):
+        """
+        One-hot encoding of boards given as piece values, shape (n, 7, 8) -> (n, 2, 7, 8, 3)
+        (the same array as encode_many on the corresponding states).
+        """
+        signs = np.stack([board > 0, board < 0], axis=1)
+        types = np.abs(board)[:, None, :, :, None] == np.arange(1, TYPES + 1)
+        return (signs[..., None] & types).astype(np.float64)
+
+    @staticmethod
+    def encode_many(states):
+        """One-hot encoding of a list of states, shape (len(states), 2, 7, 8, 3)."""
+        board = np.zeros((len(states),) + PieceSquareTables.SHAPE)
+        for b, state in enumerate(states):
+            for (row, col), piece in state.pieces.items():
+                board[b, 0 if piece > 0 else 1, row, col, abs(piece) - 1] = 1.0
+        return board
+
+    def score(self, state, player):
+        """
+        Score of one state for `player`: score_many on a batch of one, so that single and
+        batched evaluations add exactly the same float.
+        """
+        return float(self.score_many([state], player)[0])
+
+    def score_many(self, states, player, encoded=None):
+        """
+        Scores of a batch of states for `player`, as one tensor contraction.
+
+        Args:
+            states (list of FenixState): The positions to score.
+            player (int): 1 or -1.
+            encoded (np.ndarray, optional): encode_many(states), if already computed.
+
+        Returns:
+            np.ndarray: One score per state.
+        """
+        if encoded is None:
+            encoded = self.encode_many(states)
+        return player * np.einsum("bsrct,srct->b", encoded, self._signed)
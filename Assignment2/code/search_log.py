@@ -0,0 +1,69 @@
+"""
+Leveled logging for the agents, built on the standard logging module.
+
+Messages use %-style arguments (log.debug("depth %s", depth)): when a level is disabled,
+logging checks it before building the message, so nothing is formatted. Until
+configure_logging is called, only warnings and errors are shown.
+"""
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import sys
+
+ROOT = "fenix"
+
+# flush_logging enregistré à la fin du processus (une seule fois)
+_exit_flush = None
+
+
+def get_logger(name):
+    """Logger of an agent module, child of the "fenix" logger."""
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def configure_logging(level=logging.INFO, path=None, console=True, buffer_size=1000):
+    """
+    Configures the agents' logging for the current process.
+
+    Args:
+        level (int, optional): Minimum level shown (default: logging.INFO).
+        path (str, optional): File sink; "{pid}" is replaced by the process id so that
+            each pool worker writes its own file (default: None, no file).
+        console (bool, optional): Also write to stdout (default: True).
+        buffer_size (int, optional): Number of records buffered in memory before they are
+            written to the file; errors are written immediately (default: 1000). The
+            buffer is flushed when the process exits normally; pool workers, which are
+            terminated rather than exited, must call flush_logging after each task.
+    """
+    logger = logging.getLogger(ROOT)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(level)
+    logger.propagate = False
+
+    formatter = logging.Formatter("%(message)s")
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(formatter)
+        logger.addHandler(stream)
+    if path is not None:
+        file_handler = logging.FileHandler(path.format(pid=os.getpid()), encoding="utf-8")
+        file_handler.setFormatter(formatter)
+        logger.addHandler(logging.handlers.MemoryHandler(
+            buffer_size, flushLevel=logging.ERROR, target=file_handler
+        ))
+        # les workers d'un Pool ne passent pas par l'arrêt atexit de logging, mais par
+        # les finaliseurs de multiprocessing (sauf s'ils sont tués par Pool.terminate)
+        global _exit_flush
+        if _exit_flush is None:
+            _exit_flush = multiprocessing.util.Finalize(None, flush_logging, exitpriority=10)
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+
+
+def flush_logging():
+    """Writes buffered records to their file (call at the end of each pool task)."""
+    for handler in logging.getLogger(ROOT).handlers:
+        handler.flush()
@@ -0,0 +1,93 @@
+"""
+Per-move search statistics, and a helper for game managers to save them per game.
+"""
+import json
+import time
+
+
+class SearchStats:
+    """
+    Counters of one search (one call to act).
+
+    Attributes:
+        nodes (int): Nodes visited by the alpha-beta search (root children included).
+        interior_nodes (int): Nodes whose moves were generated and searched.
+        children (int): Moves generated at interior nodes (for the branching factor).
+        cutoffs (int): Interior nodes that failed high (beta cutoff, or alpha on min nodes).
+        first_move_cutoffs (int): Cutoffs produced by the first move searched.
+        evaluations (int): Static evaluations requested (cached or not).
+        tt_probes, tt_hits (int): Transposition table lookups, and valid entries found.
+        depth (int): Depth of the deepest completed search (-1: no search).
+    """
+
+    def __init__(self, turn=0):
+        self.turn = turn
+        self.nodes = 0
+        self.interior_nodes = 0
+        self.children = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.evaluations = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.eval_cache_hits = 0
+        self.eval_cache_misses = 0
+        self.depth = -1
+        self.time = 0.0
+        self._start = time.perf_counter()
+
+    def stop(self, eval_cache=None, hits_before=0, misses_before=0):
+        """Ends the measure; eval cache counters are taken as a difference."""
+        self.time = time.perf_counter() - self._start
+        if eval_cache is not None:
+            self.eval_cache_hits = eval_cache.hits - hits_before
+            self.eval_cache_misses = eval_cache.misses - misses_before
+
+    @staticmethod
+    def _ratio(a, b):
+        return round(a / b, 4) if b else 0.0
+
+    def to_dict(self):
+        return {
+            "turn": self.turn,
+            "depth": self.depth,
+            "time_s": round(self.time, 4),
+            "nodes": self.nodes,
+            "nps": round(self.nodes / self.time) if self.time > 0 else 0,
+            "branching_factor": self._ratio(self.children, self.interior_nodes),
+            "cutoff_rate": self._ratio(self.cutoffs, self.interior_nodes),
+            "first_move_cutoff_rate": self._ratio(self.first_move_cutoffs, self.cutoffs),
+            "evaluations": self.evaluations,
+            "eval_cache_hit_rate": self._ratio(self.eval_cache_hits, self.eval_cache_hits + self.eval_cache_misses),
+            "tt_probes": self.tt_probes,
+            "tt_hit_rate": self._ratio(self.tt_hits, self.tt_probes),
+        }
+
+
+class GameStatsRecorder:
+    """
+    Collects the per-move statistics of both agents during a game (agents exposing
+    `last_stats`, a dict, after act) and appends them as one JSON line per game.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.moves = []
+
+    def record(self, agent, player):
+        stats = getattr(agent, "last_stats", None)
+        if stats is not None:
+            record = {"player": player}
+            record.update(stats)
+            self.moves.append(record)
+
+    def save(self, red_agent, black_agent, winner):
+        if self.path is None:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "red_agent": str(red_agent),
+                "black_agent": str(black_agent),
+                "winner": winner,
+                "moves": self.moves,
+            }) + "\n")
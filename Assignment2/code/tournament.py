@@ -0,0 +1,167 @@
+import functools
+import itertools
+import logging
+import multiprocessing
+import traceback
+
+from agent import Agent
+import past_agents
+from headless_game_manager import HeadlessGameManager
+import history_manager
+from search_log import configure_logging, flush_logging, get_logger
+
+log = get_logger("tournament")
+
+# agents disponibles, par nom de classe
+AGENTS = {cls.__name__: cls for cls in past_agents.all_agents + [Agent]}
+
+
+def schedule(names, rounds=1):
+    """
+    Round-robin with colour swaps: every pair of agents plays 2 * rounds games,
+    each agent playing red in half of them.
+
+    Args:
+        names (list of str): Agent names (keys of AGENTS).
+        rounds (int, optional): Number of double rounds (default: 1).
+
+    Returns:
+        list of tuple: (game_id, red agent name, black agent name).
+    """
+    unknown = [name for name in names if name not in AGENTS]
+    if unknown:
+        raise ValueError(f"Unknown agents: {unknown} (available: {list(AGENTS)})")
+    games = []
+    for _ in range(rounds):
+        for first, second in itertools.combinations(names, 2):
+            games.append((first, second))
+            games.append((second, first))
+    return [(game_id, red, black) for game_id, (red, black) in enumerate(games)]
+
+
+def play_game(game, total_time=300, depth=3):
+    """
+    Plays one scheduled game in a worker process.
+
+    Returns:
+        dict: The game, and either the result of HeadlessGameManager.play and the
+            agents' str(), or the error that ended the game.
+    """
+    game_id, red, black = game
+    record = {"game_id": game_id, "red": red, "black": black}
+    try:
+        red_agent = AGENTS[red](player=1, depth=depth)
+        black_agent = AGENTS[black](player=-1, depth=depth)
+        winner, moves_red, moves_black, used_red, used_black = HeadlessGameManager(
+            red_agent, black_agent, total_time=total_time
+        ).play()
+    except Exception:
+        record["error"] = traceback.format_exc()
+        return record
+    finally:
+        # le Pool tue ses workers à la fin : les logs tamponnés sont écrits après chaque partie
+        flush_logging()
+    record.update({
+        "red_agent": str(red_agent),
+        "black_agent": str(black_agent),
+        "winner": winner,
+        "total_moves_red": moves_red,
+        "total_moves_black": moves_black,
+        "used_time_red": used_red,
+        "used_time_black": used_black,
+    })
+    return record
+
+
+class Standings:
+    """Points per agent (1 per win, 0.5 per draw), updated game by game."""
+
+    def __init__(self, names):
+        self.rows = {name: {"games": 0, "wins": 0, "draws": 0, "losses": 0, "errors": 0} for name in names}
+
+    def record(self, result):
+        red, black = self.rows[result["red"]], self.rows[result["black"]]
+        if "error" in result:
+            red["errors"] += 1
+            black["errors"] += 1
+            return
+        red["games"] += 1
+        black["games"] += 1
+        if result["winner"] == 1:
+            red["wins"] += 1
+            black["losses"] += 1
+        elif result["winner"] == -1:
+            black["wins"] += 1
+            red["losses"] += 1
+        else:
+            red["draws"] += 1
+            black["draws"] += 1
+
+    def points(self, name):
+        row = self.rows[name]
+        return row["wins"] + 0.5 * row["draws"]
+
+    def table(self):
+        """Rows (name, points, counters) sorted by points."""
+        return sorted(
+            ((name, self.points(name), row) for name, row in self.rows.items()),
+            key=lambda item: item[1], reverse=True,
+        )
+
+
+def run_tournament(names, rounds=1, processes=None, total_time=300, depth=3, update_history=True):
+    """
+    Runs a round-robin tournament on a process pool. Games are handed out one at a time
+    to the free workers and their results are yielded as soon as they finish; the
+    history file is updated here, in the main process only.
+
+    Args:
+        names (list of str): Agent names (keys of AGENTS).
+        rounds (int, optional): Number of double rounds (default: 1).
+        processes (int, optional): Pool size (default: number of cores).
+        total_time (int, optional): Clock of each player, in seconds (default: 300).
+        depth (int, optional): Depth given to every agent (default: 3).
+        update_history (bool, optional): Add each game to history.txt (default: True).
+
+    Yields:
+        tuple: (result of play_game, Standings after this game).
+    """
+    games = schedule(names, rounds)
+    standings = Standings(names)
+    worker = functools.partial(play_game, total_time=total_time, depth=depth)
+    with multiprocessing.Pool(processes=processes, initializer=configure_logging,
+                              initargs=(logging.WARNING, None, False)) as pool:
+        for result in pool.imap_unordered(worker, games, chunksize=1):
+            standings.record(result)
+            if "error" not in result and update_history:
+                history_manager.update_history(
+                    red_agent=result["red_agent"],
+                    black_agent=result["black_agent"],
+                    winner=result["winner"],
+                    total_moves_red=result["total_moves_red"],
+                    total_moves_black=result["total_moves_black"],
+                    used_time_red=result["used_time_red"],
+                    used_time_black=result["used_time_black"],
+                )
+            yield result, standings
+
+
+if __name__ == "__main__":
+    NAMES = ["Agent", "AlphaBeta", "AlphaBetaPlus", "Alpha_variable_depth", "Alpha_no_depth"]  # ← agents du tournoi
+    ROUNDS = 1
+
+    configure_logging(logging.INFO)
+    total = len(schedule(NAMES, ROUNDS))
+    for done, (result, standings) in enumerate(run_tournament(NAMES, ROUNDS), start=1):
+        if "error" in result:
+            log.warning("[%s/%s] partie %s (%s - %s) interrompue :\n%s",
+                        done, total, result["game_id"], result["red"], result["black"], result["error"])
+        else:
+            log.info("[%s/%s] %s (rouge) - %s (noir) : vainqueur %s en %s coups",
+                     done, total, result["red"], result["black"], result["winner"],
+                     result["total_moves_red"] + result["total_moves_black"])
+
+    log.info("Classement :")
+    for name, points, row in standings.table():
+        log.info("  %-22s %5.1f pts  (%s V / %s N / %s D, %s erreurs)",
+                 name, points, row["wins"], row["draws"], row["losses"], row["errors"])
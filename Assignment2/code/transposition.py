@@ -0,0 +1,132 @@
+"""
+Transposition table stored in a multiprocessing.shared_memory block, so that several
+search processes (Lazy SMP) can read and write the same table without locks.
+"""
+import struct
+from multiprocessing import shared_memory
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+_WORDS = 3  # mots de 64 bits par entrée
+_MASK = (1 << 64) - 1
+
+
+def _float_bits(value):
+    return struct.unpack("<Q", struct.pack("<d", value))[0]
+
+
+def _bits_float(bits):
+    return struct.unpack("<d", struct.pack("<Q", bits))[0]
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size transposition table living in shared memory.
+
+    Each entry is three 64-bit words: (key ^ value ^ info, value, info), where value holds
+    the raw bits of the float score and info packs depth, bound flag and move code.
+    Writes are not atomic, so a reader recomputes the checksum and ignores any entry
+    whose words come from two different writes (torn write) or from another position.
+    The first word of the block holds the search generation: entries written by an older
+    search are replaced first, so the table can be kept from one turn to the next.
+
+    Attributes:
+        size (int): Number of entries.
+        name (str): Name of the shared memory block, used by other processes to attach.
+    """
+
+    def __init__(self, size=1 << 18, name=None, shared=True):
+        """
+        Creates a new table, or attaches to an existing one when a name is given.
+
+        Args:
+            size (int, optional): Number of entries (default: 2**18, i.e. 6 MiB).
+            name (str, optional): Name of an existing block to attach to.
+            shared (bool, optional): If False, the table lives in ordinary process memory
+                (no shared memory block to free, no name) (default: True).
+        """
+        self.size = size
+        self._owner = name is None
+        self._shm = None
+        if not shared:
+            self.name = None
+            self._buffer = bytearray((1 + size * _WORDS) * 8)
+            self._table = memoryview(self._buffer).cast("Q")
+            return
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=(1 + size * _WORDS) * 8)
+            self._shm.buf[:] = bytes((1 + size * _WORDS) * 8)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._table = self._shm.buf.cast("Q")
+
+    @property
+    def generation(self):
+        return self._table[0]
+
+    def new_search(self):
+        """Starts a new search generation (ageing of the current entries)."""
+        self._table[0] = (self._table[0] + 1) & 0xFF
+
+    def probe(self, key):
+        """
+        Looks up a position.
+
+        Args:
+            key (int): Unsigned 64-bit position key.
+
+        Returns:
+            tuple or None: (value, depth, flag, move) if a valid entry exists for this key.
+        """
+        base = 1 + (key % self.size) * _WORDS
+        table = self._table
+        check, value_bits, info = table[base], table[base + 1], table[base + 2]
+        if info == 0 or check ^ value_bits ^ info != key:
+            return None
+        return _bits_float(value_bits), (info & 0xFF) - 1, (info >> 8) & 0x3, (info >> 16) & 0xFFFF
+
+    def store(self, key, depth, value, flag, move=0):
+        """
+        Stores a search result. When two positions collide, an entry of the current
+        generation is only replaced by a search at least as deep.
+
+        Args:
+            key (int): Unsigned 64-bit position key.
+            depth (int): Remaining depth of the search that produced the value.
+            value (float): Score of the position.
+            flag (int): EXACT, LOWER (fail high) or UPPER (fail low).
+            move (int, optional): Move code of the best move (see fenix_utils.move_code).
+        """
+        base = 1 + (key % self.size) * _WORDS
+        table = self._table
+        generation = table[0]
+        old_info = table[base + 2]
+        if (old_info != 0 and old_info >> 32 == generation
+                and table[base] ^ table[base + 1] ^ old_info != key and (old_info & 0xFF) - 1 > depth):
+            return
+        value_bits = _float_bits(value)
+        info = (depth + 1) | (flag << 8) | (move << 16) | (generation << 32)
+        table[base + 1] = value_bits
+        table[base + 2] = info
+        table[base] = (key ^ value_bits ^ info) & _MASK
+
+    def clear(self):
+        for i in range(len(self._table)):
+            self._table[i] = 0
+
+    def close(self):
+        """Detaches from the block, and frees it if this process created it."""
+        if self._table is None:
+            return
+        self._table.release()
+        self._table = None
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+
+    def __del__(self):
+        # la vue sur le bloc doit être libérée avant que SharedMemory ne se ferme
+        if getattr(self, "_table", None) is not None:
+            self.close()
@@ -9,6 +9,7 @@ import time
 import past_agents
 from copy import deepcopy
 import history_manager
+from search_stats import GameStatsRecorder
 
 
 class VisualGameManager:
@@ -38,7 +39,8 @@ class VisualGameManager:
     """
     
     def __init__(
-        self, red_agent=None, black_agent=None, total_time=300, min_agent_play_time=0.5
+        self, red_agent=None, black_agent=None, total_time=300, min_agent_play_time=0.5,
+        stats_path=None
     ):
         """
         Initializes the game manager and sets up the graphical interface.
@@ -48,6 +50,8 @@ class VisualGameManager:
             black_agent (object, optional): AI agent for the black player (None for human control).
             total_time (int, optional): Total time per player in seconds (default: 300).
             min_agent_play_time (float, optional): Minimum agent thinking time (default: 0.5s).
+            stats_path (str, optional): File where the agents' per-move search statistics are
+                appended, one JSON line per game (default: None, not saved).
         """
         self.total_time = total_time
 
@@ -84,6 +88,8 @@ class VisualGameManager:
         
         self.data = {}
 
+        self.stats = GameStatsRecorder(stats_path)
+
         pygame.init()
         self.screen = pygame.display.set_mode(
             (70 * self.dim[1] + 100, 70 * self.dim[0] + 150)
@@ -172,6 +178,7 @@ class VisualGameManager:
             else self.remaining_time_black
         )
         self.agent_action = agent.act(deepcopy(self.state), remaining_time)
+        self.stats.record(agent, self.state.current_player)
 
     def update(self):
         # Vérifie les conditions de fin : victoire ou temps dépassé
@@ -406,6 +413,11 @@ class VisualGameManager:
         self.used_time_black = self.total_time - self.remaining_time_black
 
         self.data = [self.winner,self.total_moves_red, self.total_moves_black, self.used_time_red, self.used_time_black]
+        self.stats.save(self.red_agent, self.black_agent, self.winner)
+
+        for agent in (self.red_agent, self.black_agent):
+            if hasattr(agent, "close"):
+                agent.close()
 
         pygame.quit()
         return self.data
@@ -413,6 +425,10 @@ class VisualGameManager:
 
 
 if __name__ == "__main__":
+    import logging
+    from search_log import configure_logging
+
+    configure_logging(logging.INFO)
     currentAgent = agent.Agent(player=1, depth=3)
     lastBestAgent = past_agents.all_agents[0](player=-1, depth=3)
     game = VisualGameManager(currentAgent, lastBestAgent)